@@ -4,7 +4,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from supabase import Client
 
-from app.deps import get_supabase_client, get_optional_user_id
+from app.deps import get_auth_supabase_client, get_optional_user_id
 from app.auth.service import AuthService
 
 router = APIRouter(tags=["auth"])
@@ -29,7 +29,7 @@ async def login(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
-    supabase: Client = Depends(get_supabase_client)
+    supabase: Client = Depends(get_auth_supabase_client)
 ):
     """Handle login form submission"""
     try:
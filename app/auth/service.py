@@ -1,6 +1,8 @@
 """Auth service for Supabase authentication"""
 from supabase import Client
 
+from app.db import run_db
+
 
 class AuthService:
     def __init__(self, supabase: Client):
@@ -8,7 +10,7 @@ class AuthService:
     
     async def sign_in_with_password(self, email: str, password: str) -> dict:
         """Sign in with email and password"""
-        response = self.supabase.auth.sign_in_with_password({
+        response = await run_db(self.supabase.auth.sign_in_with_password, {
             "email": email,
             "password": password
         })
@@ -11,23 +11,88 @@ class Settings:
     # Supabase
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    SUPABASE_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    SUPABASE_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_HTTP_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "30"))
+    DB_THREADPOOL_SIZE: int = int(os.getenv("DB_THREADPOOL_SIZE", "20"))  # concurrent blocking Supabase calls
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     
+    # LLM gateway
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")  # "openai" or "fake"
+    LLM_MODE: str = os.getenv("LLM_MODE", "live")  # "live", "record" or "replay"
+    # Live-mode response cache; replays sampled output, so only for dev and benchmarks
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", "")
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+    LLM_FAKE_LATENCY_MS: float = float(os.getenv("LLM_FAKE_LATENCY_MS", "0"))
+    
     # App
     APP_SECRET_KEY: str = os.getenv("APP_SECRET_KEY", "change-me-in-production")
     BASE_URL: str = os.getenv("BASE_URL", "http://localhost:8000")
+    # Bearer token for operational endpoints such as cache stats; empty disables them
+    OPS_TOKEN: str = os.getenv("OPS_TOKEN", "")
     
     # Optional
     PDF_BUCKET: str = os.getenv("PDF_BUCKET", "pdfs")
     MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", "25"))
     MAX_MCQS: int = int(os.getenv("MAX_MCQS", "200"))
+    PDF_PAGE_SIZE: int = int(os.getenv("PDF_PAGE_SIZE", "24"))
+    # "proxy" streams PDFs through the app; "redirect" sends viewers to a signed storage URL
+    PDF_DELIVERY_MODE: str = os.getenv("PDF_DELIVERY_MODE", "proxy")
+    PDF_SIGNED_URL_TTL: int = int(os.getenv("PDF_SIGNED_URL_TTL", "3600"))
+    
+    # Pipeline
+    CHUNKING_MODE: str = os.getenv("CHUNKING_MODE", "tokens")  # "tokens" or "words"
+    CHUNK_TOKEN_BUDGET: int = int(os.getenv("CHUNK_TOKEN_BUDGET", "3000"))
+    # Per-model overrides, e.g. "gpt-4o=6000,gpt-4o-mini=4000"
+    CHUNK_TOKEN_BUDGETS: str = os.getenv("CHUNK_TOKEN_BUDGETS", "")
+    LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", "8"))
+    FACT_DEDUP_THRESHOLD: float = float(os.getenv("FACT_DEDUP_THRESHOLD", "0.8"))  # 0 disables
+    MCQ_GENERATION_BATCH_SIZE: int = int(os.getenv("MCQ_GENERATION_BATCH_SIZE", "25"))
+    MCQ_GENERATION_MAX_RETRIES: int = int(os.getenv("MCQ_GENERATION_MAX_RETRIES", "2"))
+    MCQ_VALIDATION_BATCH_TOKENS: int = int(os.getenv("MCQ_VALIDATION_BATCH_TOKENS", "6000"))
+    # Defaults to the CPU count; extraction stays serial with fewer than 2 CPUs
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS") or os.cpu_count() or 1)
+    PDF_EXTRACT_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_EXTRACT_PARALLEL_MIN_PAGES", "200"))
+    
+    # Local data (caches and derived artifacts)
+    DATA_DIR: str = os.getenv("DATA_DIR", "data")
+    FACT_CACHE_ENABLED: bool = os.getenv("FACT_CACHE_ENABLED", "true").lower() == "true"
+    FACT_CACHE_MAX_MB: int = int(os.getenv("FACT_CACHE_MAX_MB", "256"))
+    ANSWER_KEY_CACHE_ENTRIES: int = int(os.getenv("ANSWER_KEY_CACHE_ENTRIES", "256"))
+    # Share answer keys between processes through a SQLite file under DATA_DIR
+    ANSWER_KEY_CACHE_SHARED: bool = os.getenv("ANSWER_KEY_CACHE_SHARED", "false").lower() == "true"
+    # Stored PDFs cached in memory and under DATA_DIR/blob_cache (0 disables a tier)
+    BLOB_CACHE_MEMORY_MB: int = int(os.getenv("BLOB_CACHE_MEMORY_MB", "64"))
+    BLOB_CACHE_DISK_MB: int = int(os.getenv("BLOB_CACHE_DISK_MB", "2048"))
+    
+    # Job queue ("sqlite" needs `python -m app.jobs.worker`; "inline" runs in the web process)
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "2"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Delay before retrying a transient failure, doubled on every further attempt
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+    
+    # Generation progress stream (seconds between checks for worker updates)
+    PROGRESS_POLL_INTERVAL: float = float(os.getenv("PROGRESS_POLL_INTERVAL", "0.5"))
     
     @property
     def MAX_UPLOAD_BYTES(self) -> int:
         return self.MAX_UPLOAD_MB * 1024 * 1024
+    
+    def chunk_token_budget(self, model: str) -> int:
+        """Get the chunk token budget for a model"""
+        for entry in self.CHUNK_TOKEN_BUDGETS.split(","):
+            name, _, budget = entry.partition("=")
+            if name.strip() == model and budget.strip():
+                return int(budget)
+        return self.CHUNK_TOKEN_BUDGET
 
 
 @lru_cache()
@@ -0,0 +1,84 @@
+"""Shared Supabase client and its HTTP connection pool"""
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+import anyio
+import httpx
+from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
+from app.config import get_settings, Settings
+
+T = TypeVar("T")
+
+def create_supabase_client(settings: Settings) -> Client:
+    """
+    Create a service-role Supabase client backed by one pooled HTTP client.
+    
+    Database and storage requests share the pool, so keep-alive connections
+    (and their TLS sessions) are reused across requests.
+    
+    Args:
+        settings: App settings
+    
+    Returns:
+        Supabase client
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT),
+        follow_redirects=True,
+        http2=True
+    )
+    
+    # The service role client never signs in, so there is no session to keep
+    options = SyncClientOptions(
+        httpx_client=http_client,
+        auto_refresh_token=False,
+        persist_session=False
+    )
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY, options)
+
+
+def close_supabase_client(client: Client) -> None:
+    """Close the client's pooled HTTP connections"""
+    if client.options.httpx_client is not None:
+        client.options.httpx_client.close()
+
+
+@lru_cache()
+def get_shared_supabase_client() -> Client:
+    """Get the process-wide service role client"""
+    return create_supabase_client(get_settings())
+
+
+def close_shared_supabase_client() -> None:
+    """Close the process-wide client, if one was created"""
+    if get_shared_supabase_client.cache_info().currsize:
+        close_supabase_client(get_shared_supabase_client())
+        get_shared_supabase_client.cache_clear()
+
+
+@lru_cache()
+def _get_db_limiter() -> anyio.CapacityLimiter:
+    return anyio.CapacityLimiter(get_settings().DB_THREADPOOL_SIZE)
+
+
+async def run_db(fn: Callable[..., T], *args) -> T:
+    """
+    Run a blocking Supabase call in the database thread pool.
+    
+    supabase-py is synchronous, so calling it directly would stall the event
+    loop for every other request. Calls run on worker threads, at most
+    DB_THREADPOOL_SIZE at a time, separately from Starlette's own thread pool.
+    """
+    return await anyio.to_thread.run_sync(fn, *args, limiter=_get_db_limiter())
+
+
+async def execute(query: Any) -> Any:
+    """Execute a PostgREST query builder without blocking the event loop"""
+    return await run_db(query.execute)
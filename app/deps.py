@@ -1,14 +1,27 @@
 """FastAPI dependencies"""
+import hmac
 from typing import Optional
 from fastapi import Depends, HTTPException, Request, status
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 
 from app.config import get_settings, Settings
 
 
-def get_supabase_client(settings: Settings = Depends(get_settings)) -> Client:
-    """Get Supabase client with service role key"""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+def get_supabase_client(request: Request) -> Client:
+    """Get the shared Supabase client with service role key, created at startup"""
+    return request.app.state.supabase
+
+
+def get_auth_supabase_client(settings: Settings = Depends(get_settings)) -> Client:
+    """
+    Get a fresh Supabase client for signing users in.
+    
+    Signing in switches a client's requests to the user's token, so this must
+    never be the shared service role client.
+    """
+    options = SyncClientOptions(auto_refresh_token=False, persist_session=False)
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY, options)
 
 
 def get_current_user_id(request: Request) -> str:
@@ -36,3 +49,22 @@ def get_current_user_token(request: Request) -> str:
 def get_optional_user_id(request: Request) -> Optional[str]:
     """Get current user ID if authenticated, None otherwise"""
     return request.session.get("user_id")
+
+
+def require_ops_token(request: Request, settings: Settings = Depends(get_settings)) -> None:
+    """
+    Allow only operators holding OPS_TOKEN.
+    
+    Operational endpoints report process-wide state covering every user, so a
+    user session is not enough. They do not exist unless OPS_TOKEN is set.
+    """
+    if not settings.OPS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.OPS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
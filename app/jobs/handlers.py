@@ -0,0 +1,140 @@
+"""Job handlers shared by the worker and the inline queue"""
+import asyncio
+
+from app.config import Settings
+from app.db import get_shared_supabase_client
+from app.jobs.queue import Job
+from app.pdfs.service import PDFService, get_content_key
+from app.pdfs.storage import StorageService
+from app.mcq.pipeline import run_mcq_generation_pipeline
+from app.mcq.pipeline.page_text import build_page_text, get_page_text_store
+from app.mcq.pipeline.persistence import fail_unfinished_mcq_set
+from app.mcq.progress import get_progress_broker
+
+GENERATE_MCQ_SET = "generate_mcq_set"
+EXTRACT_PDF_TEXT = "extract_pdf_text"
+COLLECT_PDF_CONTENT = "collect_pdf_content"
+
+
+async def handle_generate_mcq_set(job: Job, settings: Settings) -> None:
+    """Run the MCQ generation pipeline for a queued set"""
+    supabase = get_shared_supabase_client()
+    payload = job.payload
+    
+    await run_mcq_generation_pipeline(
+        mcq_set_id=payload["mcq_set_id"],
+        pdf_id=payload["pdf_id"],
+        user_id=payload["user_id"],
+        requested_count=payload["requested_count"],
+        model=payload["model"],
+        supabase=supabase,
+        settings=settings,
+        final_attempt=job.attempts >= settings.JOB_MAX_ATTEMPTS
+    )
+
+
+async def handle_extract_pdf_text(job: Job, settings: Settings) -> None:
+    """Extract and store page text for a newly uploaded PDF"""
+    supabase = get_shared_supabase_client()
+    payload = job.payload
+    storage_service = StorageService(supabase, settings)
+    
+    # Jobs queued before content hashing only carry the IDs
+    pdf = {
+        "id": payload["pdf_id"],
+        "storage_path": payload.get("storage_path")
+            or storage_service.get_storage_path(payload["user_id"], payload["pdf_id"]),
+        "content_hash": payload.get("content_hash")
+    }
+    
+    store = get_page_text_store()
+    if store.exists(get_content_key(pdf)):
+        return
+    
+    await build_page_text(storage_service, pdf, store)
+
+
+async def handle_collect_pdf_content(job: Job, settings: Settings) -> None:
+    """
+    Remove the stored file and page text of content no PDF references any more.
+    
+    An upload of the same content may insert its row and find the blob still
+    stored at any point, so the blob is first moved aside rather than
+    deleted. If a reference appeared meanwhile it is moved back, unless that
+    upload already stored the content again. Uploads insert their row before
+    looking for the blob, so one the second check misses stores it itself.
+    """
+    supabase = get_shared_supabase_client()
+    payload = job.payload
+    content_hash = payload["content_hash"]
+    storage_path = payload["storage_path"]
+    pdf_service = PDFService(supabase, settings)
+    storage_service = StorageService(supabase, settings)
+    
+    if await pdf_service.is_content_referenced(content_hash):
+        return
+    
+    trash_path = f"trash/{content_hash}-{job.job_id}.pdf"
+    try:
+        await storage_service.move(storage_path, trash_path)
+        moved = True
+    except Exception:
+        # Already removed, e.g. by an earlier attempt or another delete
+        if await storage_service.exists(storage_path):
+            raise
+        moved = False
+    
+    if await pdf_service.is_content_referenced(content_hash):
+        if moved and not await storage_service.exists(storage_path):
+            await storage_service.move(trash_path, storage_path)
+        elif moved:
+            await storage_service.delete(trash_path)
+        return
+    
+    if moved:
+        await storage_service.delete(trash_path)
+    await asyncio.to_thread(get_page_text_store().delete, get_content_key({"content_hash": content_hash}))
+
+
+async def fail_generate_mcq_set(job: Job, error: str, settings: Settings) -> None:
+    """
+    Mark the set of a generation job that failed for good.
+    
+    The pipeline marks its own failures, but a job can also die before the
+    pipeline runs (bad payload, client errors) or run out of attempts after
+    worker crashes. Without this the set would stay active forever and
+    block new generations for the PDF.
+    """
+    mcq_set_id = job.payload.get("mcq_set_id")
+    if not mcq_set_id:
+        return
+    
+    if await fail_unfinished_mcq_set(mcq_set_id, error, get_shared_supabase_client()):
+        get_progress_broker().publish(mcq_set_id, status="failed", error=error)
+
+
+JOB_HANDLERS = {
+    GENERATE_MCQ_SET: handle_generate_mcq_set,
+    EXTRACT_PDF_TEXT: handle_extract_pdf_text,
+    COLLECT_PDF_CONTENT: handle_collect_pdf_content,
+}
+
+
+JOB_FAILURE_HANDLERS = {
+    GENERATE_MCQ_SET: fail_generate_mcq_set,
+}
+
+
+async def run_job_failure(job: Job, error: str, settings: Settings) -> None:
+    """Dispatch a job that failed for good to its kind's failure handler, if any"""
+    handler = JOB_FAILURE_HANDLERS.get(job.kind)
+    if handler is not None:
+        await handler(job, error, settings)
+
+
+async def run_job(job: Job, settings: Settings) -> None:
+    """Dispatch a job to its handler"""
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind: {job.kind}")
+    await handler(job, settings)
@@ -0,0 +1,346 @@
+"""Job queue for running MCQ generation outside the web process"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+from uuid import uuid4
+
+import httpx
+import openai
+from postgrest.exceptions import APIError
+from storage3.exceptions import StorageApiError
+
+from app.config import get_settings, Settings
+
+logger = logging.getLogger(__name__)
+
+EXHAUSTED_ERROR = "Exceeded maximum attempts"
+
+# Longest wait between attempts, however many there were
+MAX_RETRY_DELAY_SECONDS = 600
+
+_RETRYABLE_ERRORS = (
+    httpx.TransportError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class Job:
+    """A unit of work claimed from the queue"""
+    
+    def __init__(self, job_id: str, kind: str, payload: dict, attempts: int = 0):
+        self.job_id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+    
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "payload": self.payload,
+            "attempts": self.attempts
+        }
+
+
+def _is_transient_status(status) -> bool:
+    # Only HTTP statuses count; PostgREST reports database errors by their
+    # SQLSTATE (e.g. "23505"), which must not be mistaken for one
+    if isinstance(status, str) and len(status) == 3 and status.isdigit():
+        status = int(status)
+    if not isinstance(status, int):
+        return False
+    return status == 429 or 500 <= status < 600
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Check whether an error, or any error it was raised from, is transient.
+    
+    Network failures, timeouts, rate limits and 5xx responses from OpenAI or
+    Supabase are worth another attempt; anything else would fail again.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, _RETRYABLE_ERRORS):
+            return True
+        if isinstance(error, httpx.HTTPStatusError) and _is_transient_status(error.response.status_code):
+            return True
+        if isinstance(error, APIError) and _is_transient_status(error.code):
+            return True
+        if isinstance(error, StorageApiError) and _is_transient_status(error.status):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def retry_delay(attempts: int, backoff_seconds: float) -> float:
+    """Seconds to wait after a job's `attempts`-th attempt failed"""
+    return min(backoff_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+
+async def run_failure_hook(job: "Job", error: str) -> None:
+    """Let the job's kind clean up after it failed for good (never raises)"""
+    from app.jobs.handlers import run_job_failure
+    
+    try:
+        await run_job_failure(job, error, get_settings())
+    except Exception:
+        logger.exception("Failure hook for job %s (%s) failed", job.job_id, job.kind)
+
+
+class JobQueue:
+    """Interface for job queue backends"""
+    
+    async def enqueue(self, kind: str, payload: dict) -> str:
+        """Add a job and return its ID"""
+        raise NotImplementedError
+    
+    async def claim(self, worker_id: str) -> Optional[Job]:
+        """Claim the next runnable job, or None if the queue is empty"""
+        raise NotImplementedError
+    
+    async def heartbeat(self, job_id: str) -> None:
+        """Extend the lease on a running job"""
+        raise NotImplementedError
+    
+    async def complete(self, job: Job) -> None:
+        """Mark a job as done"""
+        raise NotImplementedError
+    
+    async def fail(self, job: Job, error: str, retryable: bool = False) -> bool:
+        """
+        Record a failed attempt.
+        
+        A `retryable` failure with attempts left is queued again after a
+        backoff; otherwise the job fails for good and its kind's failure hook
+        runs. Returns True if the job will be retried.
+        """
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Durable job queue stored in a local SQLite file.
+    
+    Claimed jobs hold a lease that the worker renews while it runs. If a
+    worker dies, the lease expires and another worker picks the job up again,
+    until `max_attempts` is reached. Jobs that fail with a transient error
+    are queued again with exponential backoff, within the same limit.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: int = 60,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 10.0
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, "
+                "kind TEXT NOT NULL, "
+                "payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "worker_id TEXT, "
+                "error TEXT, "
+                "lease_until REAL, "
+                "created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created_at)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "run_after" not in columns:
+                # Earliest time a retried job may be claimed again
+                conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so claim() can take the write lock with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+    
+    # sqlite3 blocks (up to `timeout` on a locked file), so every call runs
+    # in a thread rather than on the event loop
+    
+    async def enqueue(self, kind: str, payload: dict) -> str:
+        return await asyncio.to_thread(self._enqueue, kind, payload)
+    
+    def _enqueue(self, kind: str, payload: dict) -> str:
+        job_id = str(uuid4())
+        now = time.time()
+        
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now)
+            )
+        return job_id
+    
+    async def claim(self, worker_id: str) -> Optional[Job]:
+        job, exhausted = await asyncio.to_thread(self._claim, worker_id)
+        for dead_job in exhausted:
+            await run_failure_hook(dead_job, EXHAUSTED_ERROR)
+        return job
+    
+    def _claim(self, worker_id: str) -> Tuple[Optional[Job], List[Job]]:
+        now = time.time()
+        
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose worker died without finishing are out of retries
+                exhausted = [
+                    Job(job_id, kind, json.loads(payload), attempts)
+                    for job_id, kind, payload, attempts in conn.execute(
+                        "SELECT id, kind, payload, attempts FROM jobs "
+                        "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                        (now, self.max_attempts)
+                    ).fetchall()
+                ]
+                conn.executemany(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    [(EXHAUSTED_ERROR, now, job.job_id) for job in exhausted]
+                )
+                
+                row = conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs "
+                    "WHERE (status = 'queued' AND (run_after IS NULL OR run_after <= ?)) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None, exhausted
+                
+                job_id, kind, payload, attempts = row
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, job_id)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        return Job(job_id, kind, json.loads(payload), attempts + 1), exhausted
+    
+    async def heartbeat(self, job_id: str) -> None:
+        await asyncio.to_thread(self._heartbeat, job_id)
+    
+    def _heartbeat(self, job_id: str) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                (now + self.lease_seconds, now, job_id)
+            )
+    
+    async def complete(self, job: Job) -> None:
+        await asyncio.to_thread(self._finish, job.job_id, "done", None)
+    
+    async def fail(self, job: Job, error: str, retryable: bool = False) -> bool:
+        if retryable and job.attempts < self.max_attempts:
+            run_after = time.time() + retry_delay(job.attempts, self.retry_backoff_seconds)
+            await asyncio.to_thread(self._requeue, job.job_id, error, run_after)
+            return True
+        
+        await asyncio.to_thread(self._finish, job.job_id, "failed", error)
+        await run_failure_hook(job, error)
+        return False
+    
+    def _requeue(self, job_id: str, error: str, run_after: float) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, worker_id = NULL, lease_until = NULL, "
+                "run_after = ?, updated_at = ? WHERE id = ?",
+                (error, run_after, time.time(), job_id)
+            )
+    
+    def _finish(self, job_id: str, status: str, error: Optional[str]) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+
+class InlineJobQueue(JobQueue):
+    """
+    Runs jobs as asyncio tasks in the current process.
+    
+    Jobs are lost on restart. Intended for local development without a
+    separate worker. Transient failures are retried in the same task.
+    """
+    
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def enqueue(self, kind: str, payload: dict) -> str:
+        from app.jobs.handlers import run_job
+        
+        job = Job(str(uuid4()), kind, payload, attempts=1)
+        task = asyncio.create_task(self._run(job, run_job))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job.job_id
+    
+    async def _run(self, job: Job, run_job) -> None:
+        while True:
+            try:
+                await run_job(job, self.settings)
+                return
+            except Exception as e:
+                if is_retryable_error(e) and job.attempts < self.settings.JOB_MAX_ATTEMPTS:
+                    delay = retry_delay(job.attempts, self.settings.JOB_RETRY_BACKOFF_SECONDS)
+                    logger.warning(
+                        "Inline job %s (%s) failed on attempt %d, retrying in %.0fs: %s",
+                        job.job_id, job.kind, job.attempts, delay, e
+                    )
+                else:
+                    logger.exception("Inline job %s (%s) failed", job.job_id, job.kind)
+                    await run_failure_hook(job, str(e))
+                    return
+            await asyncio.sleep(delay)
+            job.attempts += 1
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    """Get the configured job queue backend"""
+    settings = get_settings()
+    
+    if settings.JOB_QUEUE_BACKEND == "inline":
+        return InlineJobQueue(settings)
+    if settings.JOB_QUEUE_BACKEND == "sqlite":
+        return SQLiteJobQueue(
+            path=os.path.join(settings.DATA_DIR, "jobs.sqlite3"),
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            retry_backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS
+        )
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {settings.JOB_QUEUE_BACKEND}")
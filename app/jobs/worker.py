@@ -0,0 +1,90 @@
+"""
+Worker process that runs queued jobs.
+
+Usage:
+    python -m app.jobs.worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+from uuid import uuid4
+
+from app.config import get_settings, Settings
+from app.jobs.queue import JobQueue, Job, get_job_queue, is_retryable_error
+from app.jobs.handlers import run_job
+from app.db import close_shared_supabase_client
+from app.mcq.progress import get_progress_broker
+
+logger = logging.getLogger(__name__)
+
+
+async def _heartbeat(queue: JobQueue, job: Job, interval: float) -> None:
+    """Keep the job lease alive while it runs"""
+    while True:
+        await asyncio.sleep(interval)
+        await queue.heartbeat(job.job_id)
+
+
+async def _worker_loop(
+    queue: JobQueue,
+    worker_id: str,
+    settings: Settings,
+    stop: asyncio.Event
+) -> None:
+    """Claim and run jobs until asked to stop"""
+    while not stop.is_set():
+        job = await queue.claim(worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        logger.info("Worker %s running job %s (%s, attempt %d)", worker_id, job.job_id, job.kind, job.attempts)
+        heartbeat = asyncio.create_task(
+            _heartbeat(queue, job, max(1.0, settings.JOB_LEASE_SECONDS / 3))
+        )
+        try:
+            await run_job(job, settings)
+            await queue.complete(job)
+        except Exception as e:
+            if await queue.fail(job, str(e), retryable=is_retryable_error(e)):
+                logger.warning("Job %s failed on attempt %d, queued for retry: %s", job.job_id, job.attempts, e)
+            else:
+                logger.exception("Job %s failed", job.job_id)
+        finally:
+            heartbeat.cancel()
+
+
+async def run_worker(settings: Settings) -> None:
+    """Run WORKER_CONCURRENCY job loops until SIGINT/SIGTERM"""
+    queue = get_job_queue()
+    stop = asyncio.Event()
+    
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    base_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+    logger.info("Starting %d job loops", settings.WORKER_CONCURRENCY)
+    
+    # In-flight jobs finish before the process exits
+    try:
+        await asyncio.gather(*(
+            _worker_loop(queue, f"{base_id}-{n}", settings, stop)
+            for n in range(settings.WORKER_CONCURRENCY)
+        ))
+    finally:
+        await get_progress_broker().flush()
+        close_shared_supabase_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    settings = get_settings()
+    if settings.JOB_QUEUE_BACKEND == "inline":
+        raise SystemExit("JOB_QUEUE_BACKEND=inline runs jobs in the web process; no worker needed")
+    asyncio.run(run_worker(settings))
@@ -0,0 +1,89 @@
+"""Response cache for LLM requests: in-memory LRU in front of a directory of JSON files"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def request_key(request: dict) -> str:
+    """Stable hash of a completion request"""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of serialized LLM responses.
+    
+    The memory tier is a bounded LRU. The disk tier stores one JSON file per
+    request hash, which also serves as the record/replay store. `get` and
+    `put` may touch the disk; call them from a worker thread.
+    """
+    
+    def __init__(self, directory: Optional[str], memory_entries: int = 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+    
+    def get(self, key: str, use_memory: bool = True) -> Optional[dict]:
+        if use_memory:
+            with self._lock:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry
+        
+        if self.directory:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                with self._lock:
+                    self.disk_hits += 1
+                return entry
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key: str, entry: dict) -> None:
+        self._remember(key, entry)
+        
+        if self.directory:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    
+    def _remember(self, key: str, entry: dict) -> None:
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory)
+            }
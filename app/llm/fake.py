@@ -0,0 +1,111 @@
+"""Deterministic offline LLM backend for tests and benchmarks"""
+import asyncio
+import hashlib
+import json
+import re
+from typing import List
+
+from app.llm.gateway import LLMBackend, LLMResponse
+from app.mcq.pipeline.tokens import estimate_tokens
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_FACT_BLOCK_RE = re.compile(
+    r"Fact ID: (?P<id>.*)\nFact: (?P<fact>.*)\nPages: \[(?P<pages>[^\]]*)\]\nDifficulty: (?P<difficulty>\w+)"
+)
+_DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Answers the pipeline's prompts locally with deterministic JSON.
+    
+    Fact extraction turns sentences into facts, generation builds one MCQ per
+    fact, and validation returns the MCQs unchanged. `latency_ms` simulates
+    request time.
+    """
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+    
+    async def complete(self, request: dict) -> LLMResponse:
+        self.calls += 1
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+        
+        prompt = request["messages"][-1]["content"]
+        
+        if "Extract atomic facts" in prompt:
+            data = self._facts(prompt)
+        elif "multiple choice questions based on these facts" in prompt:
+            data = self._mcqs(prompt)
+        elif "Review these MCQs" in prompt:
+            data = self._validate(prompt)
+        else:
+            data = {}
+        
+        content = json.dumps(data)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in request["messages"])
+        completion_tokens = estimate_tokens(content)
+        
+        return LLMResponse(
+            content=content,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        )
+    
+    def _facts(self, prompt: str) -> dict:
+        text = prompt.split("Text:\n", 1)[-1].rsplit("\n\nReturn a JSON", 1)[0]
+        facts = []
+        for sentence in _SENTENCE_RE.split(text):
+            sentence = sentence.strip()
+            if len(sentence.split()) < 5:
+                continue
+            digest = _digest(sentence)
+            facts.append({
+                "id": f"fact_{digest:016x}",
+                "fact": sentence,
+                "difficulty": _DIFFICULTIES[digest % 3]
+            })
+        return {"facts": facts}
+    
+    def _mcqs(self, prompt: str) -> dict:
+        mcqs = []
+        for match in _FACT_BLOCK_RE.finditer(prompt):
+            fact = match.group("fact").strip()
+            digest = _digest(fact)
+            answer = "ABCD"[digest % 4]
+            distractors = [f"It is not the case that {fact[:1].lower()}{fact[1:]} ({n})" for n in range(3)]
+            choices = distractors[:"ABCD".index(answer)] + [fact] + distractors["ABCD".index(answer):]
+            mcqs.append({
+                "question": f"Which statement is supported by the text? ({digest % 1000})",
+                "choice_a": choices[0],
+                "choice_b": choices[1],
+                "choice_c": choices[2],
+                "choice_d": choices[3],
+                "answer": answer,
+                "explanation": f"The text states: {fact}",
+                "difficulty": match.group("difficulty"),
+                "bloom": "remember",
+                "fact_id": match.group("id").strip(),
+                "source_pages": self._pages(match.group("pages"))
+            })
+        return {"mcqs": mcqs}
+    
+    @staticmethod
+    def _pages(pages: str) -> List[int]:
+        return [int(p) for p in pages.split(",") if p.strip().isdigit()]
+    
+    def _validate(self, prompt: str) -> dict:
+        body = prompt.split("fix any issues:\n", 1)[-1].split("\n\nCheck for:", 1)[0]
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {"mcqs": []}
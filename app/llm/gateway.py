@@ -0,0 +1,182 @@
+"""LLM gateway with response caching, record/replay and pluggable backends"""
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from openai import AsyncOpenAI
+
+from app.config import get_settings, Settings
+from app.llm.cache import ResponseCache, request_key
+from app.llm.usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMReplayMiss(Exception):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class LLMResponse:
+    """Text content and token usage of a chat completion"""
+    
+    def __init__(self, content: str, usage: Optional[dict] = None, cached: bool = False):
+        self.content = content
+        self.usage = usage or {}
+        self.cached = cached
+        # Set while a fresh response waits for LLMGateway.commit
+        self.cache_key: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        return {
+            "content": self.content,
+            "usage": self.usage
+        }
+
+
+class LLMBackend:
+    """Interface for chat completion backends"""
+    
+    async def complete(self, request: dict) -> LLMResponse:
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    """Chat completions through the OpenAI API"""
+    
+    def __init__(self, api_key: str):
+        self.client = AsyncOpenAI(api_key=api_key)
+    
+    async def complete(self, request: dict) -> LLMResponse:
+        response = await self.client.chat.completions.create(**request)
+        usage = response.usage.model_dump() if response.usage else {}
+        return LLMResponse(
+            content=response.choices[0].message.content,
+            usage={
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0)
+            }
+        )
+
+
+class LLMGateway:
+    """
+    Single entry point for chat completions.
+    
+    Modes:
+        live: serve from the cache when possible, otherwise call the backend
+        record: always call the backend and write the response to the cache
+        replay: serve only recorded responses; a miss raises LLMReplayMiss
+    
+    Fresh responses are only cached once the caller has parsed them and
+    passes them to `commit`, so a retry after unusable output (malformed
+    JSON, missing fields) reaches the backend again instead of the same
+    cached response.
+    """
+    
+    MODES = ("live", "record", "replay")
+    
+    def __init__(self, backend: LLMBackend, cache: Optional[ResponseCache] = None, mode: str = "live"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown LLM mode: {mode}")
+        if mode != "live" and cache is None:
+            raise ValueError(f"LLM mode '{mode}' requires a response cache")
+        
+        self.backend = backend
+        self.cache = cache
+        self.mode = mode
+        self.requests = 0
+        self.backend_calls = 0
+    
+    async def complete(
+        self,
+        model: str,
+        messages: List[dict],
+        temperature: float,
+        response_format: Optional[dict] = None
+    ) -> LLMResponse:
+        """Run a chat completion and return its content and usage"""
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        
+        self.requests += 1
+        key = request_key(request)
+        
+        if self.cache is not None and self.mode != "record":
+            # Replay must reflect what is on disk, not what this process remembers
+            entry = await asyncio.to_thread(self.cache.get, key, use_memory=self.mode == "live")
+            if entry is not None:
+                record_usage(entry.get("usage") or {}, cached=True)
+                return LLMResponse(entry["content"], entry.get("usage"), cached=True)
+            if self.mode == "replay":
+                raise LLMReplayMiss(f"No recorded response for request {key}")
+        
+        self.backend_calls += 1
+        response = await self.backend.complete(request)
+        record_usage(response.usage)
+        
+        if self.cache is not None:
+            response.cache_key = key
+        
+        return response
+    
+    async def commit(self, response: LLMResponse) -> None:
+        """Cache a fresh response after the caller has used it successfully"""
+        if self.cache is None or response.cache_key is None:
+            return
+        key, response.cache_key = response.cache_key, None
+        try:
+            await asyncio.to_thread(self.cache.put, key, response.to_dict())
+        except OSError:
+            # The response was already used; only the cached copy is lost
+            logger.exception("Failed to cache LLM response %s", key)
+    
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "requests": self.requests,
+            "backend_calls": self.backend_calls,
+            "cache": self.cache.stats() if self.cache else None
+        }
+
+
+def create_llm_gateway(settings: Settings) -> LLMGateway:
+    """Build a gateway from settings"""
+    if settings.LLM_BACKEND == "fake":
+        from app.llm.fake import FakeLLMBackend
+        backend = FakeLLMBackend(latency_ms=settings.LLM_FAKE_LATENCY_MS)
+    elif settings.LLM_BACKEND == "openai":
+        backend = OpenAIBackend(settings.OPENAI_API_KEY)
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
+    
+    cache = None
+    if settings.LLM_MODE != "live":
+        # Record/replay always need a directory of recorded responses
+        cache = ResponseCache(
+            directory=settings.LLM_CACHE_DIR or os.path.join(settings.DATA_DIR, "llm_cache"),
+            memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES
+        )
+    elif settings.LLM_CACHE_ENABLED:
+        # Opt-in: a hit returns the same sampled output, so regenerating a set
+        # would repeat its questions. Fact extraction has its own cache.
+        # Keeps a memory LRU, plus a disk tier only if a directory is set
+        cache = ResponseCache(
+            directory=settings.LLM_CACHE_DIR or None,
+            memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES
+        )
+    
+    return LLMGateway(backend, cache, mode=settings.LLM_MODE)
+
+
+@lru_cache()
+def get_llm_gateway() -> LLMGateway:
+    """Get the process-wide LLM gateway"""
+    return create_llm_gateway(get_settings())
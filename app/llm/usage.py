@@ -0,0 +1,61 @@
+"""Token usage accounting for LLM calls"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class LLMUsage:
+    """Running totals of LLM calls and tokens"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+    
+    def add(self, usage: dict, cached: bool = False) -> None:
+        if cached:
+            # Served without an API call, so no tokens were spent
+            self.cached_calls += 1
+            return
+        self.calls += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0) or 0
+        self.completion_tokens += usage.get("completion_tokens", 0) or 0
+        self.total_tokens += usage.get("total_tokens", 0) or 0
+    
+    def merge(self, other: "LLMUsage") -> None:
+        self.calls += other.calls
+        self.cached_calls += other.cached_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+    
+    def to_dict(self) -> dict:
+        return {
+            "llm_calls": self.calls,
+            "llm_cached_calls": self.cached_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens
+        }
+
+
+_current_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage(usage: LLMUsage) -> Iterator[LLMUsage]:
+    """Attribute LLM usage in this context (including tasks it spawns) to `usage`"""
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(usage: dict, cached: bool = False) -> None:
+    """Add a call's usage to the tracker for the current context, if any"""
+    tracker = _current_usage.get()
+    if tracker is not None:
+        tracker.add(usage, cached=cached)
@@ -1,5 +1,6 @@
 """FastAPI application entry point"""
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI
@@ -8,6 +9,8 @@ from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config import get_settings
+from app.db import get_shared_supabase_client, close_shared_supabase_client
+from app.mcq.progress import get_progress_broker
 from app.auth.router import router as auth_router
 from app.pdfs.router import router as pdfs_router
 from app.mcq.router import router as mcq_router
@@ -15,7 +18,19 @@ from app.quiz.router import router as quiz_router
 
 settings = get_settings()
 
-app = FastAPI(title="PDF to MCQ")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared Supabase client at startup and close its connections at shutdown"""
+    app.state.supabase = get_shared_supabase_client()
+    try:
+        yield
+    finally:
+        await get_progress_broker().flush()
+        close_shared_supabase_client()
+
+
+app = FastAPI(title="PDF to MCQ", lifespan=lifespan)
 
 # Session middleware with proper cookie settings
 app.add_middleware(
@@ -1,15 +1,25 @@
 """Main MCQ generation pipeline orchestrator"""
-from openai import OpenAI
+import asyncio
+from typing import List
+
 from supabase import Client
 
 from app.config import Settings
+from app.jobs.queue import is_retryable_error
+from app.pdfs.service import PDFService
 from app.pdfs.storage import StorageService
-from app.mcq.pipeline.pdf_extract import extract_text_from_pdf
-from app.mcq.pipeline.chunking import chunk_text
+from app.llm.gateway import get_llm_gateway
+from app.mcq.pipeline.page_text import get_or_build_page_text, get_page_text_store
+from app.mcq.pipeline.chunking import TextChunk, chunk_text, chunk_text_by_tokens
+from app.mcq.pipeline.tokens import get_token_counter
 from app.mcq.pipeline.facts import extract_facts_from_chunks
-from app.mcq.pipeline.generation import generate_mcqs_from_facts
+from app.mcq.pipeline.fact_cache import get_fact_cache
+from app.mcq.pipeline.dedup import deduplicate_facts
+from app.mcq.pipeline.generation import MCQ, generate_mcqs_from_facts
 from app.mcq.pipeline.validation import validate_and_repair_mcqs
-from app.mcq.pipeline.persistence import persist_mcqs, update_mcq_set_status
+from app.mcq.pipeline.persistence import MCQWriter, delete_mcqs, update_mcq_set_status
+from app.mcq.pipeline.metrics import PipelineMetrics
+from app.mcq.progress import get_progress_broker
 
 
 async def run_mcq_generation_pipeline(
@@ -19,7 +29,8 @@ async def run_mcq_generation_pipeline(
     requested_count: int,
     model: str,
     supabase: Client,
-    settings: Settings
+    settings: Settings,
+    final_attempt: bool = True
 ):
     """
     Run the complete MCQ generation pipeline.
@@ -32,49 +43,157 @@ async def run_mcq_generation_pipeline(
         model: OpenAI model to use
         supabase: Supabase client
         settings: App settings
+        final_attempt: False if the job queue will retry transient failures,
+            in which case they leave the set queued instead of failed
     """
+    metrics = PipelineMetrics()
+    progress = get_progress_broker()
+    status = "running"
+    
+    def report(stage: str):
+        def on_progress(completed: int, total: int):
+            progress.publish(
+                mcq_set_id, status=status, stage=stage, completed=completed, total=total
+            )
+        return on_progress
+    
     try:
         # Update status to running
         await update_mcq_set_status(mcq_set_id, "running", supabase)
+        progress.publish(mcq_set_id, status="running", stage="loading")
         
         # Initialize services
         storage_service = StorageService(supabase, settings)
-        openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        llm = get_llm_gateway()
         
-        # Step 1: Download PDF from storage
-        pdf_bytes = await storage_service.download_pdf(user_id, pdf_id)
+        # Step 1-2: Load page text extracted at upload (download and extract if missing).
+        # It is keyed by content, so a re-upload of known bytes skips both.
+        pdf = await PDFService(supabase, settings).get_pdf(pdf_id, user_id)
+        page_text = await get_or_build_page_text(
+            storage_service, pdf, get_page_text_store(), metrics
+        )
+        metrics.count("pages", page_text.page_count)
+        metrics.count("words", page_text.total_words)
         
-        # Step 2: Extract text from PDF
-        pages = extract_text_from_pdf(pdf_bytes)
+        # Step 3: Chunk text (tokenizing every page is CPU-bound, and loading
+        # the encoding may hit the network; keep both off the event loop)
+        def make_chunks() -> List[TextChunk]:
+            if settings.CHUNKING_MODE == "tokens":
+                return list(chunk_text_by_tokens(
+                    page_text.pages,
+                    max_tokens=settings.chunk_token_budget(model),
+                    count_tokens=get_token_counter(model)
+                ))
+            return list(chunk_text(page_text.pages, target_words=1000, overlap_words=100))
         
-        # Step 3: Chunk text
-        chunks = chunk_text(pages, target_words=1000, overlap_words=100)
+        with metrics.stage("chunking"):
+            chunks = await asyncio.to_thread(make_chunks)
+        metrics.count("chunks", len(chunks))
+        report("fact_extraction")(0, len(chunks))
         
         # Step 4: Extract facts from chunks
-        facts = await extract_facts_from_chunks(chunks, openai_client, model)
+        with metrics.stage("fact_extraction"):
+            facts = await extract_facts_from_chunks(
+                chunks,
+                llm,
+                model,
+                concurrency=settings.LLM_CONCURRENCY,
+                fact_cache=get_fact_cache(),
+                on_progress=report("fact_extraction")
+            )
+        metrics.count("facts", len(facts))
+        
+        # Drop near-duplicate facts from overlapping chunks
+        if settings.FACT_DEDUP_THRESHOLD > 0:
+            with metrics.stage("dedup"):
+                facts = await asyncio.to_thread(
+                    deduplicate_facts, facts, threshold=settings.FACT_DEDUP_THRESHOLD
+                )
+            metrics.count("facts_deduplicated", len(facts))
         
         # Need enough facts to generate MCQs
         if len(facts) < requested_count:
             raise Exception(f"Not enough facts extracted ({len(facts)}) to generate {requested_count} MCQs")
         
-        # Step 5: Generate MCQs from facts
-        mcqs = await generate_mcqs_from_facts(facts, requested_count, openai_client, model)
+        # Steps 5-7: Generate, validate and persist MCQs batch by batch, so the
+        # first questions are available after one batch instead of the whole run.
+        # Validation and persistence run inside generation, so their stage
+        # seconds are summed over batches and overlap the generation stage.
+        await delete_mcqs(mcq_set_id, supabase)  # left by an interrupted earlier attempt
+        writer = MCQWriter(mcq_set_id, supabase)
+        generated_count = 0
+        validated_count = 0
+        
+        async def persist_batch(mcqs: List[MCQ]) -> List[MCQ]:
+            nonlocal status, generated_count, validated_count
+            generated_count += len(mcqs)
+            progress.publish(
+                mcq_set_id, status=status, stage="validation",
+                completed=validated_count, total=generated_count, mcq_count=writer.written
+            )
+            with metrics.stage("validation"):
+                validated_mcqs = await validate_and_repair_mcqs(
+                    mcqs,
+                    llm,
+                    model,
+                    batch_tokens=settings.MCQ_VALIDATION_BATCH_TOKENS,
+                    concurrency=1
+                )
+            validated_count += len(validated_mcqs)
+            progress.publish(
+                mcq_set_id, status=status, stage="validation",
+                completed=validated_count, total=generated_count, mcq_count=writer.written
+            )
+            if not validated_mcqs:
+                return []
+            
+            with metrics.stage("persistence"):
+                first_write = writer.written == 0
+                await writer.write(validated_mcqs)
+                if first_write:
+                    await update_mcq_set_status(mcq_set_id, "partial", supabase)
+                    status = "partial"
+            progress.publish(mcq_set_id, status=status, stage="generation", mcq_count=writer.written)
+            return validated_mcqs
         
-        # Step 6: Validate and repair MCQs
-        validated_mcqs = await validate_and_repair_mcqs(mcqs, openai_client, model)
+        progress.publish(mcq_set_id, status="running", stage="generation")
+        with metrics.stage("generation"):
+            await generate_mcqs_from_facts(
+                facts,
+                requested_count,
+                llm,
+                model,
+                batch_size=settings.MCQ_GENERATION_BATCH_SIZE,
+                concurrency=settings.LLM_CONCURRENCY,
+                max_retries=settings.MCQ_GENERATION_MAX_RETRIES,
+                on_progress=report("generation"),
+                on_batch=persist_batch
+            )
+        metrics.count("mcqs_generated", generated_count)
+        metrics.count("mcqs_validated", validated_count)
+        metrics.count("mcqs_persisted", writer.written)
         
         # Check if we have enough valid MCQs
-        if len(validated_mcqs) == 0:
+        if writer.written == 0:
             raise Exception("No valid MCQs generated after validation")
         
-        # Step 7: Persist MCQs to database
-        count = await persist_mcqs(validated_mcqs, mcq_set_id, supabase)
-        
         # Step 8: Update MCQ set status to done
-        await update_mcq_set_status(mcq_set_id, "done", supabase)
-        
+        await update_mcq_set_status(mcq_set_id, "done", supabase, metrics=metrics.to_dict())
+        progress.publish(mcq_set_id, status="done", mcq_count=writer.written)
+    
     except Exception as e:
-        # Update status to failed with error message
         error_message = str(e)
-        await update_mcq_set_status(mcq_set_id, "failed", supabase, error=error_message)
+        if not final_attempt and is_retryable_error(e):
+            # The job queue runs the set again after a backoff; keep it active
+            await update_mcq_set_status(
+                mcq_set_id, "queued", supabase, error=error_message, metrics=metrics.to_dict()
+            )
+            progress.publish(mcq_set_id, status="queued", stage="retrying", error=error_message)
+            raise
+        
+        # Update status to failed with error message
+        await update_mcq_set_status(
+            mcq_set_id, "failed", supabase, error=error_message, metrics=metrics.to_dict()
+        )
+        progress.publish(mcq_set_id, status="failed", error=error_message)
         raise
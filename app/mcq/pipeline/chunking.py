@@ -1,20 +1,26 @@
 """Text chunking utilities"""
-from typing import List, Dict, Tuple
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count
+from operator import add
+from typing import Callable, List, Dict, Iterator, Optional
 
 
 class TextChunk:
     """Represents a chunk of text with metadata"""
     
-    def __init__(self, text: str, page_numbers: List[int], chunk_id: str):
+    def __init__(self, text: str, page_numbers: List[int], chunk_id: str, token_count: Optional[int] = None):
         self.text = text
         self.page_numbers = page_numbers
         self.chunk_id = chunk_id
+        self.token_count = token_count
     
     def to_dict(self) -> dict:
         return {
             "text": self.text,
             "page_numbers": self.page_numbers,
-            "chunk_id": self.chunk_id
+            "chunk_id": self.chunk_id,
+            "token_count": self.token_count
         }
 
 
@@ -22,57 +28,162 @@ def chunk_text(
     pages: Dict[int, str],
     target_words: int = 1000,
     overlap_words: int = 100
-) -> List[TextChunk]:
+) -> Iterator[TextChunk]:
     """
     Chunk text from multiple pages with overlap.
     
+    Chunks are yielded lazily. Page numbers are resolved by bisecting the
+    word offsets at which each page starts, so no per-word page list is kept,
+    and each chunk's text is one slice of a single combined string.
+    
     Args:
         pages: Dictionary mapping page number to text
         target_words: Target number of words per chunk
         overlap_words: Number of words to overlap between chunks
         
     Returns:
-        List of TextChunk objects
+        Iterator of TextChunk objects
     """
-    chunks = []
-    chunk_id = 0
+    if overlap_words >= target_words:
+        raise ValueError("overlap_words must be smaller than target_words")
     
-    # Combine all pages into a single text with page tracking
-    combined_text = []
-    word_to_page = []  # Track which page each word belongs to
+    # Join all words with single spaces into one string and record where each
+    # word starts, so chunk text is a single slice instead of a list of words
+    parts = []
+    word_starts = array("q")  # Character offset of each word in the combined text
+    page_starts = []  # Word offset of the first word of each non-empty page
+    page_nums = []
+    offset = 0
     
     for page_num in sorted(pages.keys()):
-        text = pages[page_num]
-        words = text.split()
-        combined_text.extend(words)
-        word_to_page.extend([page_num] * len(words))
+        page_words = pages[page_num].split()
+        if not page_words:
+            continue
+        
+        page_starts.append(len(word_starts))
+        page_nums.append(page_num)
+        # Word i starts after the lengths of words 0..i-1 plus i separating spaces
+        word_starts.extend(map(add, accumulate(map(len, page_words[:-1]), initial=offset), count()))
+        
+        page_text = " ".join(page_words)
+        parts.append(page_text)
+        offset += len(page_text) + 1
+    
+    combined_text = " ".join(parts)
+    del parts
+    
+    total_words = len(word_starts)
+    chunk_id = 0
     
     # Create chunks
     start_idx = 0
-    while start_idx < len(combined_text):
-        # Get words for this chunk
-        end_idx = min(start_idx + target_words, len(combined_text))
-        chunk_words = combined_text[start_idx:end_idx]
+    while start_idx < total_words:
+        end_idx = min(start_idx + target_words, total_words)
         
-        # Get unique page numbers for this chunk
-        chunk_pages = sorted(set(word_to_page[start_idx:end_idx]))
+        # Pages containing the first and last word of this chunk
+        first_page = bisect_right(page_starts, start_idx) - 1
+        last_page = bisect_right(page_starts, end_idx - 1) - 1
         
-        # Create chunk
-        chunk_text = " ".join(chunk_words)
-        chunk = TextChunk(
-            text=chunk_text,
-            page_numbers=chunk_pages,
+        text_end = word_starts[end_idx] - 1 if end_idx < total_words else len(combined_text)
+        
+        yield TextChunk(
+            text=combined_text[word_starts[start_idx]:text_end],
+            page_numbers=page_nums[first_page:last_page + 1],
             chunk_id=f"chunk_{chunk_id}"
         )
-        chunks.append(chunk)
         
         chunk_id += 1
         
+        # Break if we've reached the end
+        if end_idx >= total_words:
+            break
+        
         # Move to next chunk with overlap
         start_idx = end_idx - overlap_words
+
+
+def chunk_text_by_tokens(
+    pages: Dict[int, str],
+    max_tokens: int,
+    count_tokens: Callable[[str], int]
+) -> Iterator[TextChunk]:
+    """
+    Pack pages into chunks that fit a token budget.
+    
+    Consecutive pages are packed together while they fit within
+    `max_tokens`. A page that is larger than the budget on its own is split
+    into word windows that each fit, and its last window is packed with the
+    pages that follow. Chunks never overlap.
+    
+    Args:
+        pages: Dictionary mapping page number to text
+        max_tokens: Maximum tokens per chunk
+        count_tokens: Function returning the token count of a string
         
-        # Break if we've reached the end
-        if end_idx >= len(combined_text):
-            break
+    Returns:
+        Iterator of TextChunk objects with token_count set
+    """
+    chunk_id = 0
+    current_texts = []
+    current_pages = []
+    current_tokens = 0
+    
+    def make_chunk(text: str, page_numbers: List[int]) -> TextChunk:
+        nonlocal chunk_id
+        chunk = TextChunk(
+            text=text,
+            page_numbers=page_numbers,
+            chunk_id=f"chunk_{chunk_id}",
+            token_count=count_tokens(text)
+        )
+        chunk_id += 1
+        return chunk
+    
+    for page_num in sorted(pages.keys()):
+        page_text = " ".join(pages[page_num].split())
+        if not page_text:
+            continue
+        
+        page_tokens = count_tokens(page_text)
+        
+        # Flush before a page that would overflow the current chunk
+        if current_texts and (page_tokens > max_tokens or current_tokens + page_tokens > max_tokens):
+            yield make_chunk(" ".join(current_texts), current_pages)
+            current_texts, current_pages, current_tokens = [], [], 0
+        
+        if page_tokens > max_tokens:
+            pieces = list(_split_to_budget(page_text, page_tokens, max_tokens, count_tokens))
+            for piece in pieces[:-1]:
+                yield make_chunk(piece, [page_num])
+            # The tail of the page can still be packed with the following pages
+            page_text = pieces[-1]
+            page_tokens = count_tokens(page_text)
+        
+        current_texts.append(page_text)
+        current_pages.append(page_num)
+        current_tokens += page_tokens
+    
+    if current_texts:
+        yield make_chunk(" ".join(current_texts), current_pages)
+
+
+def _split_to_budget(
+    text: str,
+    text_tokens: int,
+    max_tokens: int,
+    count_tokens: Callable[[str], int]
+) -> Iterator[str]:
+    """Split text into consecutive word windows that each fit max_tokens"""
+    words = text.split()
+    # Start from the average words-per-token ratio and shrink windows that overflow
+    window = max(1, len(words) * max_tokens // text_tokens)
     
-    return chunks
+    start = 0
+    while start < len(words):
+        size = min(window, len(words) - start)
+        piece = " ".join(words[start:start + size])
+        while size > 1 and count_tokens(piece) > max_tokens:
+            size = max(1, size * 9 // 10)
+            piece = " ".join(words[start:start + size])
+        yield piece
+        start += size
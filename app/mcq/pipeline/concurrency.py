@@ -0,0 +1,42 @@
+"""Bounded concurrency helpers for pipeline LLM calls"""
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+
+async def gather_bounded(
+    factories: Iterable[Callable[[], Awaitable[T]]],
+    limit: int,
+    on_done: Optional[Callable[[int, int], None]] = None
+) -> List[Union[T, BaseException]]:
+    """
+    Run coroutine factories concurrently with at most `limit` in flight.
+    
+    Args:
+        factories: Callables that each return an awaitable when invoked
+        limit: Maximum number of awaitables running at the same time
+        on_done: Called with (finished, total) each time an awaitable finishes
+        
+    Returns:
+        Results in the same order as `factories`. A failed call yields its
+        exception in place of a result instead of cancelling the others.
+    """
+    factories = list(factories)
+    semaphore = asyncio.Semaphore(max(1, limit))
+    finished = 0
+    
+    async def run(factory: Callable[[], Awaitable[T]]) -> T:
+        nonlocal finished
+        async with semaphore:
+            try:
+                return await factory()
+            finally:
+                finished += 1
+                if on_done is not None:
+                    on_done(finished, len(factories))
+    
+    return await asyncio.gather(
+        *(run(factory) for factory in factories),
+        return_exceptions=True
+    )
@@ -0,0 +1,133 @@
+"""Near-duplicate fact elimination using MinHash and locality-sensitive hashing"""
+import hashlib
+import re
+import struct
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from app.mcq.pipeline.facts import Fact
+
+NUM_BANDS = 8
+ROWS_PER_BAND = 4
+NUM_PERMUTATIONS = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Each 64-byte BLAKE2b digest yields 16 independent 32-bit hash values
+_HASHES_PER_DIGEST = 16
+_DIGEST_SALTS = [
+    f"minhash{n}".encode()
+    for n in range(NUM_PERMUTATIONS // _HASHES_PER_DIGEST)
+]
+_DIGEST_FORMAT = struct.Struct(f"<{_HASHES_PER_DIGEST}I")
+
+
+def _shingles(text: str) -> Set[str]:
+    """Word shingles of normalized text"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def _signature(shingles: Set[str]) -> List[int]:
+    """MinHash signature over the shingle set"""
+    rows = []
+    for shingle in shingles:
+        data = shingle.encode("utf-8")
+        row = ()
+        for salt in _DIGEST_SALTS:
+            row += _DIGEST_FORMAT.unpack(hashlib.blake2b(data, digest_size=64, salt=salt).digest())
+        rows.append(row)
+    # Column-wise minimum: one independent hash function per signature slot
+    return list(map(min, zip(*rows)))
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _provenance_rank(position: int, fact: Fact) -> tuple:
+    """Sort key preferring facts with page and chunk provenance, then earliest"""
+    return (not fact.source_pages, fact.chunk_id is None, position)
+
+
+def deduplicate_facts(facts: List[Fact], threshold: float = 0.8) -> List[Fact]:
+    """
+    Remove near-duplicate facts.
+    
+    Candidate pairs are found by banding MinHash signatures, then confirmed
+    with the exact Jaccard similarity of their word shingles. Each group of
+    duplicates keeps the copy with the best provenance, with source_pages
+    merged from the whole group. Runs in near-linear time in the number of
+    facts.
+    
+    Args:
+        facts: Facts in extraction order
+        threshold: Minimum shingle Jaccard similarity to treat two facts as duplicates
+        
+    Returns:
+        Deduplicated facts, in the order of each kept copy
+    """
+    if len(facts) < 2:
+        return list(facts)
+    
+    shingle_sets = [_shingles(fact.fact) for fact in facts]
+    
+    # Union-find over fact positions
+    parent = list(range(len(facts)))
+    
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for position, shingles in enumerate(shingle_sets):
+        if not shingles:
+            continue
+        signature = _signature(shingles)
+        for band in range(NUM_BANDS):
+            start = band * ROWS_PER_BAND
+            buckets[(band, *signature[start:start + ROWS_PER_BAND])].append(position)
+    
+    # Check every candidate pair in a bucket: two duplicates sharing a bucket
+    # with an unrelated fact must still be compared with each other
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for other in members[i + 1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                if _jaccard(shingle_sets[first], shingle_sets[other]) >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for position in range(len(facts)):
+        groups[find(position)].append(position)
+    
+    kept = []
+    for members in groups.values():
+        best = min(members, key=lambda p: _provenance_rank(p, facts[p]))
+        fact = facts[best]
+        if len(members) > 1:
+            pages = set()
+            for p in members:
+                pages.update(facts[p].source_pages or [])
+            fact = Fact(
+                fact_id=fact.fact_id,
+                fact=fact.fact,
+                source_pages=sorted(pages),
+                difficulty=fact.difficulty,
+                chunk_id=fact.chunk_id
+            )
+        kept.append((best, fact))
+    
+    kept.sort(key=lambda item: item[0])
+    return [fact for _, fact in kept]
@@ -0,0 +1,158 @@
+"""Persistent content-addressed cache of extracted facts"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from typing import List, Optional
+
+from app.config import get_settings
+from app.mcq.pipeline.prompts import EXTRACT_FACTS_PROMPT_VERSION
+
+# Bump when the payload layout changes so old entries are never read
+PAYLOAD_VERSION = "2"
+
+
+class FactCache:
+    """
+    SQLite-backed cache of extraction results keyed by chunk text, model and
+    prompt version.
+    
+    Entries hold the facts as the model returned them, before IDs, chunk and
+    default pages are filled in, because those depend on where the text sits
+    in the document being processed rather than on the text itself.
+    
+    Entries are evicted least-recently-used first once the stored payloads
+    exceed `max_bytes`. Hit/miss counters live in the same database so they
+    are shared by every process using the cache file. Methods block on
+    SQLite; call them from a worker thread.
+    """
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS facts ("
+                "key TEXT PRIMARY KEY, "
+                "payload TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "extract_seconds REAL NOT NULL DEFAULT 0, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS facts_last_access ON facts(last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                "name TEXT PRIMARY KEY, "
+                "value REAL NOT NULL DEFAULT 0)"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str = EXTRACT_FACTS_PROMPT_VERSION) -> str:
+        """Build the cache key for a chunk of text"""
+        digest = hashlib.sha256()
+        for part in (PAYLOAD_VERSION, prompt_version, model, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, text: str, model: str) -> Optional[List[dict]]:
+        """Return the cached raw facts for a chunk of text, or None on a miss"""
+        key = self.make_key(text, model)
+        
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT payload, extract_seconds FROM facts WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self._increment(conn, "misses")
+                return None
+            
+            conn.execute("UPDATE facts SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._increment(conn, "hits")
+            self._increment(conn, "saved_seconds", row[1])
+        
+        return json.loads(row[0])
+    
+    def put(self, text: str, model: str, raw_facts: List[dict], extract_seconds: float = 0.0) -> None:
+        """Store the raw facts for a chunk of text and evict old entries if over budget"""
+        key = self.make_key(text, model)
+        payload = json.dumps(raw_facts)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO facts (key, payload, size, extract_seconds, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), extract_seconds, time.time())
+            )
+            self._evict(conn)
+    
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM facts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM facts ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM facts WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        
+        self._increment(conn, "evictions", evicted)
+    
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, name: str, amount: float = 1) -> None:
+        conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size"""
+        with closing(self._connect()) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM facts"
+            ).fetchone()
+        
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        lookups = hits + misses
+        
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": int(counters.get("evictions", 0)),
+            "saved_llm_seconds": round(counters.get("saved_seconds", 0.0), 2),
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
+
+
+@lru_cache()
+def get_fact_cache() -> Optional[FactCache]:
+    """Get the process-wide fact cache, or None if disabled"""
+    settings = get_settings()
+    if not settings.FACT_CACHE_ENABLED:
+        return None
+    return FactCache(
+        path=os.path.join(settings.DATA_DIR, "fact_cache.sqlite3"),
+        max_bytes=settings.FACT_CACHE_MAX_MB * 1024 * 1024
+    )
@@ -1,10 +1,30 @@
 """Facts extraction from text chunks using OpenAI"""
+import asyncio
 import json
-from typing import List, Dict
-from openai import OpenAI
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional
 
+from app.llm.gateway import LLMGateway
 from app.mcq.pipeline.prompts import EXTRACT_FACTS_PROMPT
 from app.mcq.pipeline.chunking import TextChunk
+from app.mcq.pipeline.concurrency import gather_bounded
+
+if TYPE_CHECKING:
+    from app.mcq.pipeline.fact_cache import FactCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_fact_id(chunk: TextChunk, position: int) -> str:
+    """
+    Document-wide fact ID from the chunk and the fact's position in it.
+    
+    The model's own ids ("f1", "fact_1", ...) are only unique within one
+    response, and MCQ batches mix facts from several chunks, so they cannot
+    be used to trace a question back to its fact.
+    """
+    return f"{chunk.chunk_id}_fact_{position}"
 
 
 class Fact:
@@ -26,28 +46,66 @@ class Fact:
             "difficulty": self.difficulty,
             "chunk_id": self.chunk_id
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "Fact":
+        return cls(
+            fact_id=data["fact_id"],
+            fact=data["fact"],
+            source_pages=data.get("source_pages", []),
+            difficulty=data.get("difficulty", "medium"),
+            chunk_id=data.get("chunk_id")
+        )
+
+
+def build_facts(chunk: TextChunk, raw_facts: List[dict]) -> List[Fact]:
+    """
+    Build Facts from the model's output for a chunk.
+    
+    Facts the model gave no pages for are attributed to the whole chunk.
+    Cached output goes through here too, so IDs and default pages always
+    come from the chunk being processed, not the one first extracted.
+    """
+    return [
+        Fact(
+            fact_id=make_fact_id(chunk, position),
+            fact=fact_data.get("fact", ""),
+            source_pages=fact_data.get("source_pages", chunk.page_numbers),
+            difficulty=fact_data.get("difficulty", "medium"),
+            chunk_id=chunk.chunk_id
+        )
+        for position, fact_data in enumerate(raw_facts)
+    ]
 
 
 async def extract_facts_from_chunk(
     chunk: TextChunk,
-    openai_client: OpenAI,
-    model: str
+    llm: LLMGateway,
+    model: str,
+    fact_cache: Optional["FactCache"] = None
 ) -> List[Fact]:
     """
     Extract atomic facts from a text chunk using OpenAI.
     
     Args:
         chunk: TextChunk to extract facts from
-        openai_client: OpenAI client instance
+        llm: LLM gateway used for completions
         model: OpenAI model to use
-        
+        fact_cache: Optional cache consulted before calling OpenAI
+    
     Returns:
         List of Fact objects
     """
+    if fact_cache is not None:
+        cached = await asyncio.to_thread(fact_cache.get, chunk.text, model)
+        if cached is not None:
+            return build_facts(chunk, cached)
+    
+    started = time.monotonic()
     prompt = EXTRACT_FACTS_PROMPT.format(text=chunk.text)
     
     try:
-        response = openai_client.chat.completions.create(
+        response = await llm.complete(
             model=model,
             messages=[
                 {"role": "system", "content": "You are an expert educator extracting facts from educational content."},
@@ -57,46 +115,74 @@ async def extract_facts_from_chunk(
             response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content
+        content = response.content
         data = json.loads(content)
-        
-        facts = []
-        for fact_data in data.get("facts", []):
-            fact = Fact(
-                fact_id=fact_data.get("id", f"{chunk.chunk_id}_fact_{len(facts)}"),
-                fact=fact_data.get("fact", ""),
-                source_pages=fact_data.get("source_pages", chunk.page_numbers),
-                difficulty=fact_data.get("difficulty", "medium"),
-                chunk_id=chunk.chunk_id
-            )
-            facts.append(fact)
-        
-        return facts
-        
+        raw_facts = [
+            {key: fact_data[key] for key in ("fact", "source_pages", "difficulty") if key in fact_data}
+            for fact_data in data.get("facts", [])
+        ]
+        facts = build_facts(chunk, raw_facts)
+        await llm.commit(response)
+    
     except Exception as e:
         raise Exception(f"Failed to extract facts: {str(e)}")
+    
+    if fact_cache is not None:
+        await asyncio.to_thread(
+            fact_cache.put, chunk.text, model, raw_facts, extract_seconds=time.monotonic() - started
+        )
+    
+    return facts
 
 
 async def extract_facts_from_chunks(
     chunks: List[TextChunk],
-    openai_client: OpenAI,
-    model: str
+    llm: LLMGateway,
+    model: str,
+    concurrency: int = 8,
+    fact_cache: Optional["FactCache"] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None
 ) -> List[Fact]:
     """
-    Extract facts from multiple chunks.
+    Extract facts from multiple chunks concurrently.
+    
+    Chunks are processed with at most `concurrency` requests in flight.
+    Facts are returned in chunk order. A chunk that fails is skipped so
+    one bad response does not fail the whole job.
     
     Args:
         chunks: List of TextChunk objects
-        openai_client: OpenAI client instance
+        llm: LLM gateway used for completions
         model: OpenAI model to use
-        
+        concurrency: Maximum number of concurrent extraction requests
+        fact_cache: Optional cache of previously extracted facts
+        on_progress: Called with (chunks finished, total chunks)
+    
     Returns:
         List of all extracted Facts
     """
+    results = await gather_bounded(
+        [
+            lambda chunk=chunk: extract_facts_from_chunk(chunk, llm, model, fact_cache)
+            for chunk in chunks
+        ],
+        concurrency,
+        on_done=on_progress
+    )
+    
     all_facts = []
+    errors = []
+    
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, BaseException):
+            errors.append(f"{chunk.chunk_id}: {result}")
+            continue
+        all_facts.extend(result)
     
-    for chunk in chunks:
-        facts = await extract_facts_from_chunk(chunk, openai_client, model)
-        all_facts.extend(facts)
+    if errors:
+        if len(errors) == len(chunks):
+            first_error = next(r for r in results if isinstance(r, BaseException))
+            raise Exception(f"Failed to extract facts from all {len(chunks)} chunks: {errors[0]}") from first_error
+        logger.warning("Fact extraction failed for %d of %d chunks: %s", len(errors), len(chunks), errors)
     
     return all_facts
@@ -1,10 +1,15 @@
 """MCQ generation using OpenAI"""
+import asyncio
 import json
-from typing import List, Dict
-from openai import OpenAI
+import logging
+from typing import Awaitable, Callable, List, Dict, Optional
 
+from app.llm.gateway import LLMGateway
 from app.mcq.pipeline.prompts import GENERATE_MCQS_PROMPT
 from app.mcq.pipeline.facts import Fact
+from app.mcq.pipeline.concurrency import gather_bounded
+
+logger = logging.getLogger(__name__)
 
 
 class MCQ:
@@ -24,7 +29,8 @@ class MCQ:
         fact_id: str = None,
         source_pages: List[int] = None,
         chunk_id: str = None,
-        flags: List[str] = None
+        flags: List[str] = None,
+        idx: int = None
     ):
         self.question = question
         self.choice_a = choice_a
@@ -39,6 +45,7 @@ class MCQ:
         self.source_pages = source_pages or []
         self.chunk_id = chunk_id
         self.flags = flags or []
+        self.idx = idx
     
     def to_dict(self) -> dict:
         return {
@@ -54,44 +61,136 @@ class MCQ:
             "fact_id": self.fact_id,
             "source_pages": self.source_pages,
             "chunk_id": self.chunk_id,
-            "flags": self.flags
+            "flags": self.flags,
+            "idx": self.idx
         }
 
 
 async def generate_mcqs_from_facts(
     facts: List[Fact],
     count: int,
-    openai_client: OpenAI,
-    model: str
+    llm: LLMGateway,
+    model: str,
+    batch_size: int = 25,
+    concurrency: int = 8,
+    max_retries: int = 2,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_batch: Optional[Callable[[List[MCQ]], Awaitable[List[MCQ]]]] = None
 ) -> List[MCQ]:
     """
     Generate MCQs from extracted facts.
     
+    The selected facts are split into batches that are generated
+    concurrently. Each batch is retried on its own, and a batch that still
+    fails is dropped instead of failing the whole set.
+    
     Args:
         facts: List of Fact objects
         count: Number of MCQs to generate
-        openai_client: OpenAI client instance
+        llm: LLM gateway used for completions
         model: OpenAI model to use
+        batch_size: Number of facts (and questions) per request
+        concurrency: Maximum number of concurrent generation requests
+        max_retries: Retries per batch after the first attempt
+        on_progress: Called with (batches finished, total batches)
+        on_batch: Awaited with each batch's MCQs as soon as the batch is
+            generated; returns the MCQs it kept (e.g. validated and
+            persisted, with their stored idx), which replace the batch in
+            the result. A batch whose callback raises counts as failed
         
     Returns:
-        List of MCQ objects
+        List of MCQ objects in batch order. Without `on_batch` they are
+        numbered from 0; otherwise they keep the idx `on_batch` gave them
     """
     # Select facts to use (prioritize diverse difficulties)
     selected_facts = _select_facts(facts, count)
     
+    batch_size = max(1, batch_size)
+    batches = [
+        selected_facts[start:start + batch_size]
+        for start in range(0, len(selected_facts), batch_size)
+    ]
+    
+    async def run_batch(batch: List[Fact]) -> List[MCQ]:
+        mcqs = await generate_mcq_batch_with_retry(batch, llm, model, max_retries)
+        if on_batch is not None:
+            mcqs = await on_batch(mcqs)
+        return mcqs
+    
+    results = await gather_bounded(
+        [lambda batch=batch: run_batch(batch) for batch in batches],
+        concurrency,
+        on_done=on_progress
+    )
+    
+    batch_mcqs = []
+    errors = []
+    
+    for batch_num, result in enumerate(results):
+        if isinstance(result, BaseException):
+            errors.append(f"batch {batch_num}: {result}")
+            continue
+        batch_mcqs.append(result)
+    
+    if errors:
+        if len(errors) == len(batches):
+            first_error = next(r for r in results if isinstance(r, BaseException))
+            raise Exception(f"All {len(batches)} MCQ generation batches failed: {errors[0]}") from first_error
+        logger.warning("MCQ generation failed for %d of %d batches: %s", len(errors), len(batches), errors)
+    
+    if on_batch is not None:
+        # Already numbered by whatever persisted them
+        return [mcq for batch in batch_mcqs for mcq in batch]
+    return merge_mcq_batches(batch_mcqs)
+
+
+async def generate_mcq_batch_with_retry(
+    facts: List[Fact],
+    llm: LLMGateway,
+    model: str,
+    max_retries: int = 2
+) -> List[MCQ]:
+    """Generate one MCQ per fact, retrying the batch with backoff on failure"""
+    attempt = 0
+    while True:
+        try:
+            return await generate_mcq_batch(facts, llm, model)
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(2 ** attempt)
+            attempt += 1
+
+
+async def generate_mcq_batch(
+    facts: List[Fact],
+    llm: LLMGateway,
+    model: str
+) -> List[MCQ]:
+    """
+    Generate one MCQ per fact in a single request.
+    
+    Args:
+        facts: Facts to turn into questions
+        llm: LLM gateway used for completions
+        model: OpenAI model to use
+        
+    Returns:
+        List of MCQ objects with provenance filled in from the facts
+    """
     # Format facts for prompt
     facts_text = "\n\n".join([
         f"Fact ID: {f.fact_id}\n"
         f"Fact: {f.fact}\n"
         f"Pages: {f.source_pages}\n"
         f"Difficulty: {f.difficulty}"
-        for f in selected_facts
+        for f in facts
     ])
     
-    prompt = GENERATE_MCQS_PROMPT.format(count=count, facts=facts_text)
+    prompt = GENERATE_MCQS_PROMPT.format(count=len(facts), facts=facts_text)
     
     try:
-        response = openai_client.chat.completions.create(
+        response = await llm.complete(
             model=model,
             messages=[
                 {"role": "system", "content": "You are an expert educator creating high-quality multiple choice questions."},
@@ -101,7 +200,7 @@ async def generate_mcqs_from_facts(
             response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content
+        content = response.content
         data = json.loads(content)
         
         mcqs = []
@@ -121,10 +220,44 @@ async def generate_mcqs_from_facts(
             )
             mcqs.append(mcq)
         
-        return mcqs
+        await llm.commit(response)
         
     except Exception as e:
         raise Exception(f"Failed to generate MCQs: {str(e)}")
+    
+    _attach_provenance(mcqs, facts)
+    return mcqs
+
+
+def merge_mcq_batches(batches: List[List[MCQ]]) -> List[MCQ]:
+    """Concatenate batch results in batch order and reassign idx"""
+    merged = []
+    for batch in batches:
+        merged.extend(batch)
+    
+    for idx, mcq in enumerate(merged):
+        mcq.idx = idx
+    
+    return merged
+
+
+def _attach_provenance(mcqs: List[MCQ], facts: List[Fact]) -> None:
+    """Fill fact_id, source_pages and chunk_id from the facts a batch was built from"""
+    facts_by_id = {f.fact_id: f for f in facts}
+    # When the model drops or invents fact ids, fall back to position if counts line up
+    positional = len(mcqs) == len(facts)
+    
+    for position, mcq in enumerate(mcqs):
+        fact = facts_by_id.get(mcq.fact_id)
+        if fact is None and positional:
+            fact = facts[position]
+        if fact is None:
+            continue
+        
+        mcq.fact_id = fact.fact_id
+        mcq.chunk_id = fact.chunk_id
+        if not mcq.source_pages:
+            mcq.source_pages = list(fact.source_pages)
 
 
 def _select_facts(facts: List[Fact], count: int) -> List[Fact]:
@@ -0,0 +1,61 @@
+"""Per-stage timing and token usage for pipeline runs"""
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, Optional
+
+from app.llm.usage import LLMUsage, track_usage
+
+
+class StageMetrics:
+    """Wall time and LLM usage of one pipeline stage"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.usage = LLMUsage()
+    
+    def to_dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 3),
+            **self.usage.to_dict()
+        }
+
+
+class PipelineMetrics:
+    """Collects stage metrics and document counters for one pipeline run"""
+    
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time a stage and attribute LLM usage inside it to the stage"""
+        stage = self.stages.setdefault(name, StageMetrics(name))
+        started = time.perf_counter()
+        try:
+            with track_usage(stage.usage):
+                yield stage
+        finally:
+            stage.seconds += time.perf_counter() - started
+    
+    def count(self, name: str, value: int) -> None:
+        self.counters[name] = value
+    
+    def to_dict(self) -> dict:
+        totals = LLMUsage()
+        for stage in self.stages.values():
+            totals.merge(stage.usage)
+        
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 3),
+            **totals.to_dict(),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+            "counters": dict(self.counters)
+        }
+
+
+def stage(metrics: Optional[PipelineMetrics], name: str):
+    """metrics.stage(name), or a no-op when no metrics are being collected"""
+    return metrics.stage(name) if metrics is not None else nullcontext()
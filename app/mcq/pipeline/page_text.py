@@ -0,0 +1,131 @@
+"""Per-page text artifacts extracted once per distinct PDF content"""
+import asyncio
+import gzip
+import json
+import os
+from functools import lru_cache, partial
+from typing import Dict, Optional
+
+from app.config import get_settings
+from app.pdfs.service import get_content_key
+from app.pdfs.storage import StorageService
+from app.mcq.pipeline.pdf_extract import extract_text_from_pdf
+from app.mcq.pipeline.metrics import PipelineMetrics, stage
+
+
+class PageText:
+    """Extracted text of a PDF with page and word counts"""
+    
+    def __init__(self, pages: Dict[int, str]):
+        self.pages = pages
+        self.page_count = len(pages)
+        self.word_counts = {page_num: len(text.split()) for page_num, text in pages.items()}
+    
+    @property
+    def total_words(self) -> int:
+        return sum(self.word_counts.values())
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to gzip-compressed JSON"""
+        page_nums = sorted(self.pages)
+        data = {
+            "page_count": self.page_count,
+            "page_numbers": page_nums,
+            "word_counts": [self.word_counts[n] for n in page_nums],
+            "pages": [self.pages[n] for n in page_nums]
+        }
+        return gzip.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+    
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "PageText":
+        data = json.loads(gzip.decompress(content).decode("utf-8"))
+        return cls(dict(zip(data["page_numbers"], data["pages"])))
+
+
+class PageTextStore:
+    """
+    Stores PageText artifacts as files in a local directory.
+    
+    Artifacts are keyed by content key (see get_content_key), so uploads of
+    the same bytes share one.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+    
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+    
+    def load(self, key: str) -> Optional[PageText]:
+        """Load an artifact, or None if the content has not been extracted"""
+        try:
+            with open(self._path(key), "rb") as f:
+                return PageText.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+    
+    def save(self, key: str, page_text: PageText) -> None:
+        """Write the artifact atomically"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(page_text.to_bytes())
+        os.replace(tmp_path, path)
+    
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache()
+def get_page_text_store() -> PageTextStore:
+    """Get the process-wide page text store"""
+    settings = get_settings()
+    return PageTextStore(os.path.join(settings.DATA_DIR, "page_text"))
+
+
+async def build_page_text(
+    storage_service: StorageService,
+    pdf: dict,
+    store: PageTextStore,
+    metrics: Optional[PipelineMetrics] = None
+) -> PageText:
+    """Download and parse a PDF row's file, then save its page text artifact"""
+    settings = get_settings()
+    
+    with stage(metrics, "download"):
+        pdf_bytes = await storage_service.download(pdf["storage_path"])
+    
+    with stage(metrics, "extract_text"):
+        # PyMuPDF parsing is CPU-bound; keep it off the event loop
+        pages = await asyncio.to_thread(partial(
+            extract_text_from_pdf,
+            pdf_bytes,
+            workers=settings.PDF_EXTRACT_WORKERS,
+            parallel_min_pages=settings.PDF_EXTRACT_PARALLEL_MIN_PAGES
+        ))
+        page_text = PageText(pages)
+        # Compressing and encoding a whole document's text is CPU-bound too
+        await asyncio.to_thread(store.save, get_content_key(pdf), page_text)
+    
+    return page_text
+
+
+async def get_or_build_page_text(
+    storage_service: StorageService,
+    pdf: dict,
+    store: PageTextStore,
+    metrics: Optional[PipelineMetrics] = None
+) -> PageText:
+    """Load the page text artifact, extracting it first if it is missing"""
+    with stage(metrics, "load_page_text"):
+        page_text = await asyncio.to_thread(store.load, get_content_key(pdf))
+    if page_text is None:
+        page_text = await build_page_text(storage_service, pdf, store, metrics)
+    return page_text
@@ -1,26 +1,51 @@
 """PDF text extraction using PyMuPDF"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 import fitz  # PyMuPDF
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> Dict[int, str]:
+
+def extract_text_from_pdf(
+    pdf_bytes: bytes,
+    workers: int = 1,
+    parallel_min_pages: int = 200
+) -> Dict[int, str]:
     """
     Extract text from PDF, organized by page number.
     
+    Documents with at least `parallel_min_pages` pages are split into page
+    ranges and extracted in a process pool when `workers` is greater than 1.
+    Workers are capped at the CPUs available to this process, so with fewer
+    than 2 the document is always extracted serially.
+    
     Args:
         pdf_bytes: PDF file content as bytes
+        workers: Number of worker processes for large documents
+        parallel_min_pages: Page count at which the process pool is used
         
     Returns:
         Dictionary mapping page number (1-indexed) to text content
     """
     pages = {}
+    workers = min(workers, _available_cpus())
     
     try:
         # Open PDF from bytes
         pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        page_count = len(pdf_document)
+        
+        if workers > 1 and page_count >= parallel_min_pages:
+            pdf_document.close()
+            return _extract_text_parallel(pdf_bytes, page_count, workers)
         
         # Extract text from each page
-        for page_num in range(len(pdf_document)):
+        for page_num in range(page_count):
             page = pdf_document[page_num]
             text = page.get_text()
             
@@ -35,6 +60,73 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> Dict[int, str]:
     return pages
 
 
+def _extract_page_range(pdf_bytes: bytes, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract pages [start, end) in a worker process"""
+    pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [
+            (page_num + 1, pdf_document[page_num].get_text().strip())
+            for page_num in range(start, end)
+        ]
+    finally:
+        pdf_document.close()
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on, honouring affinity masks where supported"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@lru_cache()
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawn avoids forking a process that has event loop and executor threads running
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next extraction starts a fresh one"""
+    _get_process_pool.cache_clear()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_text_parallel(pdf_bytes: bytes, page_count: int, workers: int) -> Dict[int, str]:
+    """
+    Extract contiguous page ranges in a process pool and reassemble them.
+    
+    A worker that dies (OOM kill, crash in the parser) breaks the whole
+    pool, so it is replaced and the document retried once in a fresh one.
+    A second failure is raised rather than retried in this process, in case
+    the document itself is what crashes the parser.
+    """
+    range_size = -(-page_count // workers)
+    ranges = [
+        (start, min(start + range_size, page_count))
+        for start in range(0, page_count, range_size)
+    ]
+    
+    for attempt in range(2):
+        pool = _get_process_pool(workers)
+        try:
+            futures = [
+                pool.submit(_extract_page_range, pdf_bytes, start, end)
+                for start, end in ranges
+            ]
+            pages = {}
+            for future in futures:
+                pages.update(future.result())
+            return pages
+        except BrokenProcessPool:
+            _discard_process_pool(pool)
+            if attempt:
+                raise
+            logger.warning("PDF extraction pool broke; retrying in a new pool", exc_info=True)
+
+
 def get_total_pages(pdf_bytes: bytes) -> int:
     """Get total number of pages in PDF"""
     try:
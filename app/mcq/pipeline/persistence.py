@@ -3,13 +3,15 @@ from datetime import datetime, timezone
 from typing import List
 from supabase import Client
 
+from app.db import execute
 from app.mcq.pipeline.generation import MCQ
 
 
 async def persist_mcqs(
     mcqs: List[MCQ],
     mcq_set_id: str,
-    supabase: Client
+    supabase: Client,
+    start_idx: int = 0
 ) -> int:
     """
     Persist MCQs to the database.
@@ -18,7 +20,8 @@ async def persist_mcqs(
         mcqs: List of MCQ objects
         mcq_set_id: ID of the MCQ set
         supabase: Supabase client
-        
+        start_idx: idx given to the first MCQ; the rest follow consecutively
+    
     Returns:
         Number of MCQs persisted
     """
@@ -27,7 +30,7 @@ async def persist_mcqs(
     
     # Prepare MCQ data for insertion
     mcq_records = []
-    for idx, mcq in enumerate(mcqs):
+    for idx, mcq in enumerate(mcqs, start=start_idx):
         record = {
             "mcq_set_id": mcq_set_id,
             "idx": idx,
@@ -50,26 +53,64 @@ async def persist_mcqs(
     
     # Insert all MCQs at once
     try:
-        response = supabase.table("mcqs").insert(mcq_records).execute()
+        response = await execute(supabase.table("mcqs").insert(mcq_records))
         return len(response.data)
     except Exception as e:
         raise Exception(f"Failed to persist MCQs: {str(e)}")
 
 
+async def delete_mcqs(mcq_set_id: str, supabase: Client) -> None:
+    """Delete all MCQs of a set"""
+    try:
+        await execute(supabase.table("mcqs").delete().eq("mcq_set_id", mcq_set_id))
+    except Exception as e:
+        raise Exception(f"Failed to delete MCQs: {str(e)}")
+
+
+class MCQWriter:
+    """
+    Persists an MCQ set batch by batch as batches finish.
+    
+    idx ranges are reserved before each insert, so concurrent batches never
+    collide and a question keeps its idx once written. A failed insert
+    leaves a gap in the numbering rather than shifting later questions.
+    Written MCQs get their stored idx.
+    """
+    
+    def __init__(self, mcq_set_id: str, supabase: Client):
+        self.mcq_set_id = mcq_set_id
+        self.supabase = supabase
+        self.next_idx = 0
+        self.written = 0
+    
+    async def write(self, mcqs: List[MCQ]) -> int:
+        """Persist one batch and return the number of MCQs written"""
+        start_idx = self.next_idx
+        self.next_idx += len(mcqs)
+        
+        count = await persist_mcqs(mcqs, self.mcq_set_id, self.supabase, start_idx=start_idx)
+        for idx, mcq in enumerate(mcqs, start=start_idx):
+            mcq.idx = idx
+        self.written += count
+        return count
+
+
 async def update_mcq_set_status(
     mcq_set_id: str,
     status: str,
     supabase: Client,
-    error: str = None
+    error: str = None,
+    metrics: dict = None
 ) -> None:
     """
     Update MCQ set status.
     
     Args:
         mcq_set_id: ID of the MCQ set
-        status: New status (queued, running, done, failed)
+        status: New status (queued, running, partial, done, failed)
         supabase: Supabase client
         error: Error message if status is failed
+        metrics: Per-stage timing and token usage of the run
     """
     update_data = {
         "status": status,
@@ -79,7 +120,38 @@ async def update_mcq_set_status(
     if error:
         update_data["error"] = error
     
+    if metrics is not None:
+        update_data["metrics"] = metrics
+    
+    try:
+        await execute(supabase.table("mcq_sets").update(update_data).eq("id", mcq_set_id))
+    except Exception as e:
+        raise Exception(f"Failed to update MCQ set status: {str(e)}")
+
+
+async def fail_unfinished_mcq_set(mcq_set_id: str, error: str, supabase: Client) -> bool:
+    """
+    Mark an MCQ set failed unless it already finished.
+    
+    Args:
+        mcq_set_id: ID of the MCQ set
+        error: Error message to store
+        supabase: Supabase client
+    
+    Returns:
+        True if the set was still queued, running or partial
+    """
+    update_data = {
+        "status": "failed",
+        "error": error,
+        "completed_at": datetime.now(timezone.utc).isoformat()
+    }
+    
     try:
-        supabase.table("mcq_sets").update(update_data).eq("id", mcq_set_id).execute()
+        response = await execute(
+            supabase.table("mcq_sets").update(update_data)
+            .eq("id", mcq_set_id).in_("status", ["queued", "running", "partial"])
+        )
     except Exception as e:
         raise Exception(f"Failed to update MCQ set status: {str(e)}")
+    return bool(response.data)
@@ -1,5 +1,8 @@
 """Prompts for MCQ generation pipeline"""
 
+# Bump when EXTRACT_FACTS_PROMPT changes so cached facts are not reused
+EXTRACT_FACTS_PROMPT_VERSION = "1"
+
 EXTRACT_FACTS_PROMPT = """You are an expert educator analyzing educational content to extract atomic facts.
 
 Extract atomic facts from the following text. Each fact should be:
@@ -0,0 +1,63 @@
+"""Local token counting for prompt budgeting"""
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# How long to use the estimate before trying to load a missing encoding again
+ENCODING_RETRY_SECONDS = 300
+
+_counters: Dict[str, Callable[[str], int]] = {}
+_failed_at: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count from character length"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """
+    Get a token counting function for a model.
+    
+    Uses tiktoken with the encoding files shipped in the image (see
+    TIKTOKEN_CACHE_DIR in the Dockerfile). If they are missing, tiktoken
+    downloads them, so call this off the event loop. When that fails too,
+    returns a character-based estimate; the fallback is not cached, and
+    loading is retried after ENCODING_RETRY_SECONDS.
+    """
+    with _lock:
+        counter = _counters.get(model)
+        if counter is not None:
+            return counter
+        if time.monotonic() - _failed_at.get(model, -ENCODING_RETRY_SECONDS) < ENCODING_RETRY_SECONDS:
+            return estimate_tokens
+        
+        try:
+            import tiktoken
+        except ImportError:
+            _failed_at[model] = time.monotonic()
+            return estimate_tokens
+        
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning("tiktoken encoding unavailable for %s, estimating tokens: %s", model, e)
+            _failed_at[model] = time.monotonic()
+            return estimate_tokens
+        
+        def count_tokens(text: str) -> int:
+            return len(encoding.encode(text, disallowed_special=()))
+        
+        _counters[model] = count_tokens
+        return count_tokens
@@ -1,39 +1,132 @@
 """MCQ validation and repair using OpenAI"""
 import json
-from typing import List
-from openai import OpenAI
+import logging
+from typing import Callable, List, Optional
 
+from app.llm.gateway import LLMGateway
 from app.mcq.pipeline.prompts import VALIDATE_MCQS_PROMPT
 from app.mcq.pipeline.generation import MCQ
+from app.mcq.pipeline.concurrency import gather_bounded
+from app.mcq.pipeline.tokens import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationBatchResult:
+    """Outcome of validating one batch of MCQs"""
+    
+    def __init__(self, mcqs: List[MCQ], llm_validated: bool, error: Optional[str] = None):
+        self.mcqs = mcqs
+        self.llm_validated = llm_validated
+        self.error = error
+    
+    def to_dict(self) -> dict:
+        return {
+            "count": len(self.mcqs),
+            "llm_validated": self.llm_validated,
+            "error": self.error
+        }
 
 
 async def validate_and_repair_mcqs(
     mcqs: List[MCQ],
-    openai_client: OpenAI,
-    model: str
+    llm: LLMGateway,
+    model: str,
+    batch_tokens: int = 6000,
+    concurrency: int = 8,
+    on_progress: Optional[Callable[[int, int], None]] = None
 ) -> List[MCQ]:
     """
     Validate and repair MCQs using OpenAI.
     
     Args:
         mcqs: List of MCQ objects to validate
-        openai_client: OpenAI client instance
+        llm: LLM gateway used for completions
         model: OpenAI model to use
+        batch_tokens: Approximate prompt token budget per validation batch
+        concurrency: Maximum number of concurrent validation requests
+        on_progress: Called with (batches finished, total batches)
         
     Returns:
         List of validated/repaired MCQ objects
     """
+    batch_results = await validate_mcqs_in_batches(
+        mcqs,
+        llm,
+        model,
+        batch_tokens=batch_tokens,
+        concurrency=concurrency,
+        on_progress=on_progress
+    )
+    
+    fallbacks = [r for r in batch_results if not r.llm_validated]
+    if fallbacks:
+        logger.warning(
+            "MCQ validation fell back to basic checks for %d of %d batches: %s",
+            len(fallbacks), len(batch_results), [r.error for r in fallbacks]
+        )
+    
+    validated_mcqs = []
+    for result in batch_results:
+        validated_mcqs.extend(result.mcqs)
+    return validated_mcqs
+
+
+async def validate_mcqs_in_batches(
+    mcqs: List[MCQ],
+    llm: LLMGateway,
+    model: str,
+    batch_tokens: int = 6000,
+    concurrency: int = 8,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> List[ValidationBatchResult]:
+    """
+    Validate MCQs in concurrent batches sized by an approximate token budget.
+    
+    Returns:
+        One ValidationBatchResult per batch, in input order
+    """
     if not mcqs:
         return []
     
-    # Convert MCQs to JSON for validation
-    mcqs_data = [mcq.to_dict() for mcq in mcqs]
+    batches = _batch_by_tokens(mcqs, batch_tokens)
+    
+    results = await gather_bounded(
+        [
+            lambda batch=batch: validate_mcq_batch(batch, llm, model)
+            for batch in batches
+        ],
+        concurrency,
+        on_done=on_progress
+    )
+    
+    return [
+        result if not isinstance(result, BaseException)
+        else _fallback(batch, str(result))
+        for batch, result in zip(batches, results)
+    ]
+
+
+async def validate_mcq_batch(
+    mcqs: List[MCQ],
+    llm: LLMGateway,
+    model: str
+) -> ValidationBatchResult:
+    """
+    Validate and repair a single batch of MCQs.
+    
+    If the request fails, the original MCQs that pass basic checks are
+    returned and the result is marked as not LLM-validated.
+    """
+    # Convert MCQs to JSON for validation, numbered by position so repaired
+    # questions can be matched back even before they have a stored idx
+    mcqs_data = [{**mcq.to_dict(), "idx": position} for position, mcq in enumerate(mcqs)]
     mcqs_json = json.dumps({"mcqs": mcqs_data}, indent=2)
     
     prompt = VALIDATE_MCQS_PROMPT.format(mcqs=mcqs_json)
     
     try:
-        response = openai_client.chat.completions.create(
+        response = await llm.complete(
             model=model,
             messages=[
                 {"role": "system", "content": "You are an expert educator validating and fixing multiple choice questions."},
@@ -43,9 +136,11 @@ async def validate_and_repair_mcqs(
             response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content
+        content = response.content
         data = json.loads(content)
         
+        originals = dict(enumerate(mcqs))
+        
         # Convert back to MCQ objects
         validated_mcqs = []
         for mcq_data in data.get("mcqs", []):
@@ -62,18 +157,59 @@ async def validate_and_repair_mcqs(
                 fact_id=mcq_data.get("fact_id"),
                 source_pages=mcq_data.get("source_pages", []),
                 chunk_id=mcq_data.get("chunk_id"),
-                flags=mcq_data.get("flags", [])
+                flags=mcq_data.get("flags", []),
+                idx=mcq_data.get("idx")
             )
             
+            # Keep provenance the model may have dropped while rewriting
+            original = originals.get(mcq.idx)
+            mcq.idx = original.idx if original is not None else None
+            if original is not None:
+                mcq.fact_id = mcq.fact_id or original.fact_id
+                mcq.chunk_id = mcq.chunk_id or original.chunk_id
+                mcq.source_pages = mcq.source_pages or original.source_pages
+            
             # Basic validation
             if _is_valid_mcq(mcq):
                 validated_mcqs.append(mcq)
         
-        return validated_mcqs
+        await llm.commit(response)
+        return ValidationBatchResult(validated_mcqs, llm_validated=True)
         
     except Exception as e:
-        # If validation fails, return original MCQs that pass basic checks
-        return [mcq for mcq in mcqs if _is_valid_mcq(mcq)]
+        return _fallback(mcqs, str(e))
+
+
+def _fallback(mcqs: List[MCQ], error: str) -> ValidationBatchResult:
+    """Return original MCQs that pass basic checks"""
+    return ValidationBatchResult(
+        [mcq for mcq in mcqs if _is_valid_mcq(mcq)],
+        llm_validated=False,
+        error=error
+    )
+
+
+def _batch_by_tokens(mcqs: List[MCQ], batch_tokens: int) -> List[List[MCQ]]:
+    """Greedily pack MCQs into batches whose serialized size fits the token budget"""
+    budget = max(1, batch_tokens) * CHARS_PER_TOKEN
+    
+    batches = []
+    current = []
+    current_size = 0
+    
+    for mcq in mcqs:
+        size = len(json.dumps(mcq.to_dict(), indent=2))
+        if current and current_size + size > budget:
+            batches.append(current)
+            current = []
+            current_size = 0
+        current.append(mcq)
+        current_size += size
+    
+    if current:
+        batches.append(current)
+    
+    return batches
 
 
 def _is_valid_mcq(mcq: MCQ) -> bool:
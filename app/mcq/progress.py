@@ -0,0 +1,205 @@
+"""Generation progress pub/sub for server-sent events"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class ProgressStore:
+    """
+    Latest progress event per MCQ set in a local SQLite file.
+    
+    Lets a worker process hand progress to the web process without going
+    through Supabase.
+    """
+    
+    # Finished sets are kept briefly so late subscribers still see the outcome
+    RETENTION_SECONDS = 3600
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "mcq_set_id TEXT PRIMARY KEY, "
+                "seq INTEGER NOT NULL, "
+                "event TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    def write(self, mcq_set_id: str, event: dict) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO progress (mcq_set_id, seq, event, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(mcq_set_id) DO UPDATE SET "
+                "seq = excluded.seq, event = excluded.event, updated_at = excluded.updated_at",
+                (mcq_set_id, event["seq"], json.dumps(event), now)
+            )
+            if event.get("status") in TERMINAL_STATUSES:
+                conn.execute(
+                    "DELETE FROM progress WHERE updated_at < ?",
+                    (now - self.RETENTION_SECONDS,)
+                )
+    
+    def read(self, mcq_set_ids: List[str]) -> Dict[str, dict]:
+        if not mcq_set_ids:
+            return {}
+        placeholders = ",".join("?" * len(mcq_set_ids))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT mcq_set_id, event FROM progress WHERE mcq_set_id IN ({placeholders})",
+                mcq_set_ids
+            ).fetchall()
+        return {mcq_set_id: json.loads(event) for mcq_set_id, event in rows}
+
+
+class ProgressBroker:
+    """
+    In-process fan-out of progress events to SSE subscribers.
+    
+    Events published in this process are delivered directly. Events from
+    other processes are picked up by a single relay task that polls the
+    shared ProgressStore, only while someone is subscribed.
+    
+    Writes to the store happen in a worker thread, driven by a single writer
+    task that stores only the latest pending event per set, so they stay in
+    order and never block the event loop.
+    """
+    
+    def __init__(self, store: Optional[ProgressStore] = None, poll_interval: float = 0.5):
+        self.store = store
+        self.poll_interval = poll_interval
+        self._latest: Dict[str, dict] = {}
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._relay: Optional[asyncio.Task] = None
+        self._unwritten: Dict[str, dict] = {}
+        self._writer: Optional[asyncio.Task] = None
+    
+    def publish(self, mcq_set_id: str, **fields) -> dict:
+        """Publish a progress event for an MCQ set"""
+        seq = self._seq.get(mcq_set_id, 0) + 1
+        self._seq[mcq_set_id] = seq
+        event = {"mcq_set_id": mcq_set_id, "seq": seq, "ts": time.time(), **fields}
+        
+        if self.store is not None:
+            self._unwritten[mcq_set_id] = event
+            if self._writer is None or self._writer.done():
+                self._writer = asyncio.create_task(self._run_writer())
+        
+        self._deliver(event)
+        if event.get("status") in TERMINAL_STATUSES:
+            self._seq.pop(mcq_set_id, None)
+        return event
+    
+    async def _run_writer(self) -> None:
+        """Store published events in a worker thread until none are pending"""
+        while self._unwritten:
+            events, self._unwritten = self._unwritten, {}
+            await asyncio.to_thread(self._write_events, events)
+    
+    def _write_events(self, events: Dict[str, dict]) -> None:
+        for mcq_set_id, event in events.items():
+            try:
+                self.store.write(mcq_set_id, event)
+            except sqlite3.Error:
+                logger.exception("Failed to store progress for %s", mcq_set_id)
+    
+    async def flush(self) -> None:
+        """Wait until every published event is in the store"""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+    
+    def _deliver(self, event: dict) -> None:
+        mcq_set_id = event["mcq_set_id"]
+        previous = self._latest.get(mcq_set_id)
+        # Skip events already seen, e.g. relayed copies of our own publishes
+        if previous is not None and (event["ts"], event["seq"]) <= (previous["ts"], previous["seq"]):
+            return
+        
+        if mcq_set_id in self._subscribers:
+            self._latest[mcq_set_id] = event
+        for queue in self._subscribers.get(mcq_set_id, ()):
+            queue.put_nowait(event)
+    
+    async def subscribe(
+        self,
+        mcq_set_id: str,
+        idle_timeout: Optional[float] = None
+    ) -> AsyncIterator[Optional[dict]]:
+        """
+        Yield progress events for an MCQ set, starting with the latest known one.
+        
+        Args:
+            mcq_set_id: ID of the MCQ set
+            idle_timeout: Yield None after this many seconds without an event
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(mcq_set_id, set()).add(queue)
+        
+        if self.store is not None:
+            try:
+                stored = (await asyncio.to_thread(self.store.read, [mcq_set_id])).get(mcq_set_id)
+            except sqlite3.Error:
+                logger.exception("Failed to read progress store")
+                stored = None
+            if stored is not None:
+                self._deliver(stored)
+            if self._relay is None or self._relay.done():
+                self._relay = asyncio.create_task(self._run_relay())
+        
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            subscribers = self._subscribers.get(mcq_set_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[mcq_set_id]
+                    self._latest.pop(mcq_set_id, None)
+    
+    async def _run_relay(self) -> None:
+        """Poll the shared store for subscribed sets until nobody is listening"""
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                events = await asyncio.to_thread(self.store.read, list(self._subscribers))
+            except sqlite3.Error:
+                logger.exception("Failed to read progress store")
+                continue
+            for event in events.values():
+                self._deliver(event)
+
+
+@lru_cache()
+def get_progress_broker() -> ProgressBroker:
+    """Get the process-wide progress broker"""
+    settings = get_settings()
+    return ProgressBroker(
+        store=ProgressStore(os.path.join(settings.DATA_DIR, "progress.sqlite3")),
+        poll_interval=settings.PROGRESS_POLL_INTERVAL
+    )
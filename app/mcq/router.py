@@ -1,30 +1,44 @@
 """MCQ routes"""
-from fastapi import APIRouter, Depends, HTTPException, Form, BackgroundTasks
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Form, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from supabase import Client
 
 from app.config import get_settings, Settings
-from app.deps import get_supabase_client, get_current_user_id
+from app.db import execute
+from app.deps import get_supabase_client, get_current_user_id, require_ops_token
 from app.mcq.service import MCQService
-from app.mcq.pipeline import run_mcq_generation_pipeline
+from app.mcq.pipeline.fact_cache import get_fact_cache
+from app.jobs.queue import JobQueue, get_job_queue
+from app.jobs.handlers import GENERATE_MCQ_SET
+from app.mcq.progress import TERMINAL_STATUSES, get_progress_broker
+from app.quiz.answer_key import get_answer_key_cache
+from app.pdfs.blob_cache import get_blob_cache
+from app.pdfs.signed_urls import get_signed_url_cache
 
 router = APIRouter(prefix="/api", tags=["mcq"])
 
+# Comment lines keep idle SSE connections open through proxies
+SSE_KEEPALIVE_SECONDS = 15
+
 
 @router.post("/pdfs/{pdf_id}/mcq-sets")
 async def create_mcq_set(
     pdf_id: str,
-    background_tasks: BackgroundTasks,
     requested_count: int = Form(..., ge=1, le=500),
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Create a new MCQ generation set"""
     mcq_service = MCQService(supabase, settings)
     
     # Verify PDF exists and belongs to user
-    pdf_response = supabase.table("pdfs").select("id").eq("id", pdf_id).eq("user_id", user_id).execute()
+    pdf_response = await execute(supabase.table("pdfs").select("id").eq("id", pdf_id).eq("user_id", user_id))
     if not pdf_response.data:
         raise HTTPException(status_code=404, detail="PDF not found")
     
@@ -51,17 +65,14 @@ async def create_mcq_set(
         model=settings.OPENAI_MODEL
     )
     
-    # Launch background task for generation
-    background_tasks.add_task(
-        run_mcq_generation_pipeline,
-        mcq_set_id=mcq_set["id"],
-        pdf_id=pdf_id,
-        user_id=user_id,
-        requested_count=requested_count,
-        model=settings.OPENAI_MODEL,
-        supabase=supabase,
-        settings=settings
-    )
+    # Hand generation off to the job queue
+    await job_queue.enqueue(GENERATE_MCQ_SET, {
+        "mcq_set_id": mcq_set["id"],
+        "pdf_id": pdf_id,
+        "user_id": user_id,
+        "requested_count": requested_count,
+        "model": settings.OPENAI_MODEL
+    })
     
     return JSONResponse({"mcq_set": mcq_set})
 
@@ -83,14 +94,67 @@ async def get_mcq_set(
     return JSONResponse({"mcq_set": mcq_set})
 
 
+@router.get("/mcq-sets/{mcq_set_id}/events")
+async def stream_mcq_set_events(
+    mcq_set_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_supabase_client),
+    settings: Settings = Depends(get_settings)
+):
+    """Stream generation progress for an MCQ set as server-sent events"""
+    mcq_service = MCQService(supabase, settings)
+    
+    # One database read for ownership and current status; progress comes from the broker
+    mcq_set = await mcq_service.get_mcq_set(mcq_set_id, user_id)
+    if not mcq_set:
+        raise HTTPException(status_code=404, detail="MCQ set not found")
+    
+    def format_event(event: dict) -> str:
+        return f"data: {json.dumps(event)}\n\n"
+    
+    async def event_stream():
+        if mcq_set["status"] in TERMINAL_STATUSES:
+            yield format_event({
+                "mcq_set_id": mcq_set_id,
+                "status": mcq_set["status"],
+                "error": mcq_set.get("error")
+            })
+            return
+        
+        yield format_event({"mcq_set_id": mcq_set_id, "status": mcq_set["status"]})
+        
+        events = get_progress_broker().subscribe(mcq_set_id, idle_timeout=SSE_KEEPALIVE_SECONDS)
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+                if event.get("status") in TERMINAL_STATUSES:
+                    break
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/mcq-sets/{mcq_set_id}/mcqs")
 async def get_mcqs(
     mcq_set_id: str,
+    after: Optional[int] = Query(None, ge=-1),
+    limit: int = Query(50, ge=1, le=500),
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
     settings: Settings = Depends(get_settings)
 ):
-    """Get all MCQs for a set"""
+    """Get a page of MCQs for a set; pass `next_after` back as `after` for the next page"""
     mcq_service = MCQService(supabase, settings)
     
     # Verify MCQ set belongs to user
@@ -99,6 +163,18 @@ async def get_mcqs(
         raise HTTPException(status_code=404, detail="MCQ set not found")
     
     # Get MCQs
-    mcqs = await mcq_service.get_mcqs(mcq_set_id)
+    mcqs, next_after = await mcq_service.get_mcqs(mcq_set_id, limit, after)
     
-    return JSONResponse({"mcqs": mcqs})
+    return JSONResponse({"mcqs": mcqs, "next_after": next_after})
+
+
+@router.get("/mcq-cache/stats", dependencies=[Depends(require_ops_token)])
+async def get_cache_stats():
+    """Get hit/miss counters of the fact, answer key, PDF blob and signed URL caches"""
+    fact_cache = get_fact_cache()
+    return JSONResponse({
+        "fact_cache": await asyncio.to_thread(fact_cache.stats) if fact_cache else None,
+        "answer_key_cache": get_answer_key_cache().stats(),
+        "blob_cache": get_blob_cache().stats(),
+        "signed_url_cache": get_signed_url_cache().stats()
+    })
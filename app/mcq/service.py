@@ -1,10 +1,17 @@
 """MCQ service for managing MCQ sets"""
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import uuid4
 from supabase import Client
 
 from app.config import Settings
+from app.db import execute
+
+# Columns of a set shown next to its PDF and on the quiz page
+MCQ_SET_SUMMARY_COLUMNS = "id, pdf_id, status, requested_count, error, created_at"
+
+# Columns returned by the MCQ listing API (explanations stay with the answer key)
+MCQ_LIST_COLUMNS = "id, idx, question, choice_a, choice_b, choice_c, choice_d, answer, difficulty, source_pages"
 
 
 class MCQService:
@@ -14,17 +21,17 @@ class MCQService:
     
     async def get_mcq_set(self, mcq_set_id: str, user_id: str) -> Optional[dict]:
         """Get MCQ set by ID"""
-        response = self.supabase.table("mcq_sets").select("*").eq("id", mcq_set_id).eq("user_id", user_id).single().execute()
+        response = await execute(self.supabase.table("mcq_sets").select("*").eq("id", mcq_set_id).eq("user_id", user_id).single())
         return response.data
     
     async def get_latest_mcq_set(self, pdf_id: str, user_id: str) -> Optional[dict]:
-        """Get the latest completed MCQ set for a PDF"""
-        response = self.supabase.table("mcq_sets").select("*").eq("pdf_id", pdf_id).eq("user_id", user_id).eq("status", "done").order("created_at", desc=True).limit(1).execute()
+        """Get the latest MCQ set with questions available (done, or partially generated)"""
+        response = await execute(self.supabase.table("mcq_sets").select(MCQ_SET_SUMMARY_COLUMNS).eq("pdf_id", pdf_id).eq("user_id", user_id).in_("status", ["partial", "done"]).order("created_at", desc=True).limit(1))
         return response.data[0] if response.data else None
     
     async def check_active_generation(self, pdf_id: str, user_id: str) -> bool:
         """Check if there's an active generation for this PDF"""
-        response = self.supabase.table("mcq_sets").select("id").eq("pdf_id", pdf_id).eq("user_id", user_id).in_("status", ["queued", "running"]).execute()
+        response = await execute(self.supabase.table("mcq_sets").select("id").eq("pdf_id", pdf_id).eq("user_id", user_id).in_("status", ["queued", "running", "partial"]).limit(1))
         return len(response.data) > 0
     
     async def create_mcq_set(self, pdf_id: str, user_id: str, requested_count: int, model: str) -> dict:
@@ -39,10 +46,31 @@ class MCQService:
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        response = self.supabase.table("mcq_sets").insert(mcq_set_data).execute()
+        response = await execute(self.supabase.table("mcq_sets").insert(mcq_set_data))
         return response.data[0]
     
-    async def get_mcqs(self, mcq_set_id: str) -> List[dict]:
-        """Get all MCQs for a set"""
-        response = self.supabase.table("mcqs").select("*").eq("mcq_set_id", mcq_set_id).order("idx").execute()
-        return response.data
+    async def get_mcqs(
+        self,
+        mcq_set_id: str,
+        limit: int,
+        after_idx: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Get a page of a set's MCQs in idx order.
+        
+        Args:
+            mcq_set_id: ID of the MCQ set
+            limit: Page size
+            after_idx: Last idx of the previous page, or None for the first page
+        
+        Returns:
+            Tuple of (MCQs, idx to pass as after_idx for the next page or None)
+        """
+        query = self.supabase.table("mcqs").select(MCQ_LIST_COLUMNS).eq("mcq_set_id", mcq_set_id)
+        if after_idx is not None:
+            query = query.gt("idx", after_idx)
+        
+        response = await execute(query.order("idx").limit(limit + 1))
+        mcqs = response.data[:limit]
+        next_idx = mcqs[-1]["idx"] if len(response.data) > limit else None
+        return mcqs, next_idx
@@ -0,0 +1,213 @@
+"""Read-through cache of stored PDF files: in-memory LRU in front of a bounded directory"""
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO, Optional
+
+from app.config import get_settings
+
+
+class BlobCache:
+    """
+    Two-tier cache of storage objects keyed by storage path.
+    
+    The memory tier is a small LRU bounded by total bytes; objects larger
+    than a quarter of it go to disk only, so one big PDF cannot flush every
+    other entry. The disk tier holds one file per object and evicts the
+    least recently used files once it grows past its byte budget. It is
+    shared by every process using the same directory.
+    
+    Stored objects never change under a path (new content gets a new
+    content-hash path), so entries only need dropping when the object is
+    deleted.
+    """
+    
+    def __init__(self, directory: Optional[str], memory_max_bytes: int, disk_max_bytes: int):
+        self.directory = directory if disk_max_bytes > 0 else None
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_from_memory = 0
+        self.bytes_from_disk = 0
+        self.bytes_from_storage = 0
+        
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+    
+    def _path(self, path: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(path.encode("utf-8")).hexdigest())
+    
+    def get(self, path: str) -> Optional[bytes]:
+        """Return the cached object, promoting disk hits into memory"""
+        with self._lock:
+            data = self._memory.get(path)
+            if data is not None:
+                self._memory.move_to_end(path)
+                self.memory_hits += 1
+                self.bytes_from_memory += len(data)
+                return data
+        
+        file = self._open_disk(path)
+        if file is not None:
+            with file:
+                data = file.read()
+            self._remember(path, data)
+            with self._lock:
+                self.disk_hits += 1
+                self.bytes_from_disk += len(data)
+            return data
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def open(self, path: str) -> Optional[BinaryIO]:
+        """
+        Return the cached object as a seekable file, or None on a miss.
+        
+        Disk hits too large for the memory tier are served from the cache file
+        itself, so ranged reads of a large PDF only touch the bytes sent.
+        """
+        with self._lock:
+            data = self._memory.get(path)
+            if data is not None:
+                self._memory.move_to_end(path)
+                self.memory_hits += 1
+                self.bytes_from_memory += len(data)
+                return BytesIO(data)
+        
+        file = self._open_disk(path)
+        if file is not None:
+            size = os.fstat(file.fileno()).st_size
+            with self._lock:
+                self.disk_hits += 1
+                self.bytes_from_disk += size
+            if size <= self.memory_max_bytes // 4:
+                with file:
+                    data = file.read()
+                self._remember(path, data)
+                return BytesIO(data)
+            return file
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def record_storage_read(self, size: int) -> None:
+        """Count bytes that had to be fetched from storage"""
+        with self._lock:
+            self.bytes_from_storage += size
+    
+    def put(self, path: str, data: bytes) -> None:
+        """Cache an object fetched from or uploaded to storage"""
+        self._remember(path, data)
+        if self.directory:
+            self._write_disk(path, lambda f: f.write(data))
+    
+    def put_file(self, path: str, file: BinaryIO) -> None:
+        """Cache an uploaded object straight from its file, on disk only"""
+        if self.directory:
+            file.seek(0)
+            self._write_disk(path, lambda f: shutil.copyfileobj(file, f))
+    
+    def invalidate(self, path: str) -> None:
+        """Drop an object from both tiers"""
+        with self._lock:
+            data = self._memory.pop(path, None)
+            if data is not None:
+                self._memory_bytes -= len(data)
+        if self.directory:
+            try:
+                os.remove(self._path(path))
+            except FileNotFoundError:
+                pass
+    
+    def _open_disk(self, path: str) -> Optional[BinaryIO]:
+        if not self.directory:
+            return None
+        try:
+            file = open(self._path(path), "rb")
+        except FileNotFoundError:
+            return None
+        # Bump the modification time; eviction removes the oldest first
+        os.utime(file.fileno())
+        return file
+    
+    def _write_disk(self, path: str, write) -> None:
+        cache_path = self._path(path)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, cache_path)
+        self._evict_disk()
+    
+    def _evict_disk(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def _remember(self, path: str, data: bytes) -> None:
+        if len(data) > self.memory_max_bytes // 4:
+            return
+        with self._lock:
+            previous = self._memory.pop(path, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[path] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters, bytes served per tier and memory use"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "bytes_from_memory": self.bytes_from_memory,
+                "bytes_from_disk": self.bytes_from_disk,
+                "bytes_from_storage": self.bytes_from_storage,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes
+            }
+
+
+@lru_cache()
+def get_blob_cache() -> BlobCache:
+    """Get the process-wide blob cache"""
+    settings = get_settings()
+    return BlobCache(
+        os.path.join(settings.DATA_DIR, "blob_cache"),
+        memory_max_bytes=settings.BLOB_CACHE_MEMORY_MB * 1024 * 1024,
+        disk_max_bytes=settings.BLOB_CACHE_DISK_MB * 1024 * 1024
+    )
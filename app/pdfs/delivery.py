@@ -0,0 +1,132 @@
+"""Conditional and byte-range responses for stored PDF files"""
+import os
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from fastapi.responses import Response, StreamingResponse
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file"""
+
+
+def make_etag(content_key: str) -> str:
+    """Strong ETag for content that never changes under this key"""
+    return f'"{content_key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range.
+    
+    Args:
+        range_header: Value of the Range header
+        size: File size in bytes
+    
+    Returns:
+        Inclusive (start, end) offsets, or None to send the whole file
+        (no header, another unit, several ranges or a malformed value)
+    
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+def _iter_file(file: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_response(
+    file: BinaryIO,
+    range_header: Optional[str],
+    if_range: Optional[str],
+    etag: str,
+    headers: Dict[str, str],
+    media_type: str = "application/pdf"
+) -> Response:
+    """
+    Stream an open file, or the requested part of it.
+    
+    Args:
+        file: Seekable file; closed once the body has been sent
+        range_header: Value of the Range header
+        if_range: Value of the If-Range header; a stale validator means
+            the whole file is sent
+        etag: ETag of the file
+        headers: Extra response headers (ETag, caching)
+        media_type: Content type
+    
+    Returns:
+        200 with the whole file, 206 with one range, or 416
+    """
+    size = file.seek(0, os.SEEK_END)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        file.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(file, 0, size), media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        _iter_file(file, start, end - start + 1),
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
@@ -1,13 +1,27 @@
 """PDF routes"""
-from fastapi import APIRouter, Depends, Request, File, UploadFile, Form, HTTPException, status
+import logging
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from supabase import Client
 
 from app.config import get_settings, Settings
+from app.db import execute
 from app.deps import get_supabase_client, get_current_user_id
-from app.pdfs.service import PDFService
+from app.pdfs.service import PDFService, get_content_key
 from app.pdfs.storage import StorageService
+from app.pdfs.delivery import etag_matches, file_response, make_etag
+from app.pdfs.upload import UploadRejected, receive_upload
+from app.mcq.service import MCQ_SET_SUMMARY_COLUMNS
+from app.mcq.pipeline.page_text import get_page_text_store
+from app.quiz.answer_key import get_answer_key_cache
+from app.jobs.queue import JobQueue, get_job_queue
+from app.jobs.handlers import COLLECT_PDF_CONTENT, EXTRACT_PDF_TEXT
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["pdfs"])
 templates = Jinja2Templates(directory="app/templates")
@@ -16,17 +30,23 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/pdfs", response_class=HTMLResponse)
 async def list_pdfs_page(
     request: Request,
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
     settings: Settings = Depends(get_settings)
 ):
-    """Display list of PDFs"""
+    """Display a page of PDFs, newest first"""
     pdf_service = PDFService(supabase, settings)
-    pdfs = await pdf_service.list_pdfs(user_id)
+    try:
+        pdfs, next_cursor = await pdf_service.list_pdfs(user_id, settings.PDF_PAGE_SIZE, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     return templates.TemplateResponse("pdf_list.html", {
         "request": request,
-        "pdfs": pdfs
+        "pdfs": pdfs,
+        "is_first_page": not cursor,
+        "next_cursor": next_cursor
     })
 
 
@@ -49,7 +69,7 @@ async def view_pdf_page(
     pdf_url = f"/api/pdfs/{pdf_id}/file"
     
     # Get latest MCQ set if exists
-    mcq_sets_response = supabase.table("mcq_sets").select("*").eq("pdf_id", pdf_id).eq("user_id", user_id).order("created_at", desc=True).limit(1).execute()
+    mcq_sets_response = await execute(supabase.table("mcq_sets").select(MCQ_SET_SUMMARY_COLUMNS).eq("pdf_id", pdf_id).eq("user_id", user_id).order("created_at", desc=True).limit(1))
     latest_mcq_set = mcq_sets_response.data[0] if mcq_sets_response.data else None
     
     return templates.TemplateResponse("pdf_view.html", {
@@ -62,39 +82,55 @@ async def view_pdf_page(
 
 @router.post("/api/pdfs")
 async def upload_pdf(
-    title: str = Form(...),
-    file: UploadFile = File(...),
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
-    """Upload a new PDF"""
-    # Validate file type
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
-    # Read file content
-    content = await file.read()
-    
-    # Validate file size
-    if len(content) > settings.MAX_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds {settings.MAX_UPLOAD_MB}MB limit"
-        )
-    
-    # Create PDF record
-    pdf_service = PDFService(supabase, settings)
-    storage_service = StorageService(supabase, settings)
-    
-    from uuid import uuid4
-    pdf_id = str(uuid4())
-    
-    # Upload to storage
-    storage_path = await storage_service.upload_pdf(user_id, pdf_id, content)
-    
-    # Create database record
-    pdf = await pdf_service.create_pdf(user_id, title, storage_path, pdf_id)
+    """Upload a new PDF (multipart form with `title` and `file` fields)"""
+    # Stream the body to a spool file, rejecting it as soon as it passes the size limit
+    try:
+        upload = await receive_upload(request, "file", settings.MAX_UPLOAD_BYTES)
+    except UploadRejected as e:
+        detail = f"File size exceeds {settings.MAX_UPLOAD_MB}MB limit" if e.status_code == 413 else str(e)
+        raise HTTPException(status_code=e.status_code, detail=detail)
+    
+    with upload:
+        title = upload.fields.get("title", "").strip()
+        if not title:
+            raise HTTPException(status_code=400, detail="Title is required")
+        
+        # Validate file type
+        if not upload.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        
+        pdf_service = PDFService(supabase, settings)
+        storage_service = StorageService(supabase, settings)
+        
+        pdf_id = str(uuid4())
+        content_hash = upload.sha256
+        
+        storage_path = storage_service.get_blob_path(content_hash)
+        
+        # Identical bytes map to one blob; each upload still gets its own row.
+        # The row goes in first so a concurrent delete of another copy sees it.
+        pdf = await pdf_service.create_pdf(user_id, title, storage_path, pdf_id, content_hash=content_hash)
+        try:
+            with upload.open() as file:
+                await storage_service.upload_blob(content_hash, file)
+        except Exception:
+            await pdf_service.delete_pdf(pdf_id, user_id)
+            raise
+    
+    # Extract page text once per distinct content, off the request path
+    if not get_page_text_store().exists(content_hash):
+        await job_queue.enqueue(EXTRACT_PDF_TEXT, {
+            "pdf_id": pdf_id,
+            "user_id": user_id,
+            "storage_path": storage_path,
+            "content_hash": content_hash
+        })
     
     return JSONResponse({"pdf": pdf})
 
@@ -122,7 +158,8 @@ async def delete_pdf(
     pdf_id: str,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Delete a PDF"""
     pdf_service = PDFService(supabase, settings)
@@ -136,23 +173,43 @@ async def delete_pdf(
     # Delete from database (soft delete)
     await pdf_service.delete_pdf(pdf_id, user_id)
     
-    # Delete from storage
-    try:
-        await storage_service.delete_pdf(user_id, pdf_id)
-    except:
-        pass  # Storage deletion is optional
+    # The file and page text are shared by every upload of the same content.
+    # Remove them in a job once the last row is gone; it checks again before
+    # and after setting the blob aside, since an upload may land meanwhile.
+    content_hash = pdf.get("content_hash")
+    if content_hash:
+        if not await pdf_service.is_content_referenced(content_hash):
+            await job_queue.enqueue(COLLECT_PDF_CONTENT, {
+                "content_hash": content_hash,
+                "storage_path": pdf["storage_path"]
+            })
+    else:
+        try:
+            await storage_service.delete(pdf["storage_path"])
+        except Exception:
+            # The row is gone already; a leftover object only costs storage
+            logger.exception("Failed to delete %s from storage", pdf["storage_path"])
+        get_page_text_store().delete(get_content_key(pdf))
+    
+    await get_answer_key_cache().invalidate_pdf(pdf_id)
     
     return JSONResponse({"success": True})
 
 
 @router.get("/api/pdfs/{pdf_id}/file")
 async def get_pdf_file(
+    request: Request,
     pdf_id: str,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
     settings: Settings = Depends(get_settings)
 ):
-    """Serve PDF file"""
+    """
+    Serve PDF file, honouring If-None-Match and single byte ranges.
+    
+    With PDF_DELIVERY_MODE=redirect, owners are redirected to a signed
+    storage URL instead of the app streaming the file.
+    """
     pdf_service = PDFService(supabase, settings)
     storage_service = StorageService(supabase, settings)
     
@@ -161,9 +218,35 @@ async def get_pdf_file(
     if not pdf:
         raise HTTPException(status_code=404, detail="PDF not found")
     
+    # The content behind a PDF never changes, so its content key is a strong
+    # validator. no-cache makes the browser revalidate (still checking
+    # ownership above) and a repeat view costs a 304 instead of the file.
+    etag = make_etag(get_content_key(pdf))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    # Send the bytes straight from storage; proxy them if signing fails
+    if settings.PDF_DELIVERY_MODE == "redirect":
+        try:
+            signed_url = await storage_service.get_cached_signed_url(pdf["storage_path"])
+        except Exception:
+            logger.warning("Signing %s failed, serving it through the app", pdf["storage_path"], exc_info=True)
+            signed_url = None
+        if signed_url:
+            # Never cache the redirect itself: the URL it points at expires
+            return RedirectResponse(signed_url, status_code=302, headers={"Cache-Control": "no-store"})
+    
     # Download PDF from storage
     try:
-        pdf_content = await storage_service.download_pdf(user_id, pdf_id)
-        return Response(content=pdf_content, media_type="application/pdf")
+        file = await storage_service.open(pdf["storage_path"])
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"PDF file not found in storage: {str(e)}")
+    
+    return file_response(
+        file,
+        request.headers.get("range"),
+        request.headers.get("if-range"),
+        etag,
+        headers
+    )
@@ -1,10 +1,43 @@
 """PDF service for managing PDFs"""
+import base64
 from datetime import datetime, timezone
-from typing import List, Optional
-from uuid import uuid4
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 from supabase import Client
 
 from app.config import Settings
+from app.db import execute
+
+# Columns shown on the PDF list page
+PDF_LIST_COLUMNS = "id, title, created_at"
+
+
+def encode_pdf_cursor(pdf: dict) -> str:
+    """Opaque cursor pointing just past a PDF in the newest-first listing"""
+    return base64.urlsafe_b64encode(f"{pdf['created_at']}|{pdf['id']}".encode("utf-8")).decode("ascii")
+
+
+def decode_pdf_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor into (created_at, id); raises ValueError if malformed"""
+    try:
+        created_at, pdf_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        # Both end up inside a PostgREST filter, so only accept well-formed values
+        datetime.fromisoformat(created_at)
+        UUID(pdf_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, pdf_id
+
+
+def get_content_key(pdf: dict) -> str:
+    """
+    Key for artifacts derived from a PDF's content.
+    
+    Uploads with identical bytes share their content hash, so page text is
+    extracted once and reused across uploads and users. Rows from before
+    content hashing fall back to their own ID.
+    """
+    return pdf.get("content_hash") or pdf["id"]
 
 
 class PDFService:
@@ -12,28 +45,70 @@ class PDFService:
         self.supabase = supabase
         self.settings = settings
     
-    async def list_pdfs(self, user_id: str) -> List[dict]:
-        """List all PDFs for a user"""
-        response = self.supabase.table("pdfs").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return response.data
+    async def list_pdfs(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        List a page of a user's PDFs, newest first.
+        
+        Uses keyset pagination on (created_at, id), so every page costs the
+        same index range scan however many PDFs the user has.
+        
+        Args:
+            user_id: ID of the user
+            limit: Page size
+            cursor: Cursor from the previous page, or None for the first page
+        
+        Returns:
+            Tuple of (PDFs, cursor for the next page or None)
+        """
+        query = (
+            self.supabase.table("pdfs")
+            .select(PDF_LIST_COLUMNS)
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at, pdf_id = decode_pdf_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{pdf_id})'
+            )
+        
+        response = await execute(query)
+        pdfs = response.data[:limit]
+        next_cursor = encode_pdf_cursor(pdfs[-1]) if len(response.data) > limit else None
+        return pdfs, next_cursor
     
     async def get_pdf(self, pdf_id: str, user_id: str) -> Optional[dict]:
         """Get a single PDF by ID"""
-        response = self.supabase.table("pdfs").select("*").eq("id", pdf_id).eq("user_id", user_id).single().execute()
+        response = await execute(self.supabase.table("pdfs").select("*").eq("id", pdf_id).eq("user_id", user_id).single())
         return response.data
     
-    async def create_pdf(self, user_id: str, title: str, storage_path: str, pdf_id: str = None) -> dict:
+    async def create_pdf(
+        self,
+        user_id: str,
+        title: str,
+        storage_path: str,
+        pdf_id: str = None,
+        content_hash: Optional[str] = None
+    ) -> dict:
         """Create a new PDF record"""
         pdf_data = {
             "id": pdf_id or str(uuid4()),
             "user_id": user_id,
             "title": title,
             "storage_path": storage_path,
+            "content_hash": content_hash,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        response = self.supabase.table("pdfs").insert(pdf_data).execute()
+        response = await execute(self.supabase.table("pdfs").insert(pdf_data))
         return response.data[0]
     
     async def update_pdf_title(self, pdf_id: str, user_id: str, title: str) -> dict:
@@ -43,10 +118,15 @@ class PDFService:
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        response = self.supabase.table("pdfs").update(update_data).eq("id", pdf_id).eq("user_id", user_id).execute()
+        response = await execute(self.supabase.table("pdfs").update(update_data).eq("id", pdf_id).eq("user_id", user_id))
         return response.data[0]
     
     async def delete_pdf(self, pdf_id: str, user_id: str) -> None:
         """Delete a PDF and its associated MCQ sets and MCQs (via cascade)"""
         # Hard delete the PDF - cascade deletes will handle mcq_sets and mcqs automatically
-        self.supabase.table("pdfs").delete().eq("id", pdf_id).eq("user_id", user_id).execute()
+        await execute(self.supabase.table("pdfs").delete().eq("id", pdf_id).eq("user_id", user_id))
+    
+    async def is_content_referenced(self, content_hash: str) -> bool:
+        """Check whether any PDF, of any user, still has this content"""
+        response = await execute(self.supabase.table("pdfs").select("id").eq("content_hash", content_hash).limit(1))
+        return bool(response.data)
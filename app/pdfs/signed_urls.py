@@ -0,0 +1,59 @@
+"""Cache of signed storage URLs used to redirect PDF downloads"""
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from app.config import get_settings
+
+
+class SignedUrlCache:
+    """
+    Signed URLs by storage path, reused while enough of their lifetime is left.
+    
+    A viewer keeps issuing range requests against the URL it was redirected
+    to, so a URL is only handed out while at least `min_remaining_seconds`
+    of it remain; after that a fresh one is signed.
+    """
+    
+    def __init__(self, max_entries: int, min_remaining_seconds: float):
+        self.max_entries = max_entries
+        self.min_remaining_seconds = min_remaining_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, path: str) -> Optional[str]:
+        entry = self._entries.get(path)
+        if entry is not None and entry[1] - time.time() >= self.min_remaining_seconds:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        return None
+    
+    def put(self, path: str, url: str, expires_at: float) -> None:
+        self._entries[path] = (url, expires_at)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, path: str) -> None:
+        self._entries.pop(path, None)
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries)
+        }
+
+
+@lru_cache()
+def get_signed_url_cache() -> SignedUrlCache:
+    """Get the process-wide signed URL cache"""
+    ttl = get_settings().PDF_SIGNED_URL_TTL
+    return SignedUrlCache(max_entries=4096, min_remaining_seconds=ttl / 2)
@@ -1,61 +1,145 @@
 """Storage utilities for Supabase Storage"""
+import asyncio
+import logging
+import time
+from functools import partial
 from io import BytesIO
+from typing import BinaryIO, Union
 from supabase import Client
 
 from app.config import Settings
+from app.db import run_db
+from app.pdfs.blob_cache import get_blob_cache
+from app.pdfs.signed_urls import get_signed_url_cache
+
+logger = logging.getLogger(__name__)
 
 
 class StorageService:
+    """
+    PDF objects in Supabase Storage.
+    
+    Uploads are stored once per distinct content, at a path derived from the
+    SHA-256 of their bytes, and shared by every `pdfs` row with that hash.
+    Rows from before content addressing keep their per-user path, so reads
+    and deletes always go through the row's `storage_path`.
+    
+    Reads go through the node's blob cache (memory, then disk) before
+    Supabase; uploads pre-populate it and deletes invalidate it, along with
+    any cached signed URL.
+    """
+    
     def __init__(self, supabase: Client, settings: Settings):
         self.supabase = supabase
         self.settings = settings
         self.bucket = settings.PDF_BUCKET
+        self.cache = get_blob_cache()
+        self.signed_urls = get_signed_url_cache()
     
     def get_storage_path(self, user_id: str, pdf_id: str) -> str:
-        """Get storage path for a PDF"""
+        """Get the legacy per-user storage path for a PDF"""
         return f"{user_id}/{pdf_id}.pdf"
     
-    async def upload_pdf(self, user_id: str, pdf_id: str, file_content: bytes) -> str:
-        """Upload PDF to storage and return path"""
-        path = self.get_storage_path(user_id, pdf_id)
+    def get_blob_path(self, content_hash: str) -> str:
+        """Get the shared storage path for PDF content with a given SHA-256"""
+        return f"blobs/{content_hash}.pdf"
+    
+    async def exists(self, path: str) -> bool:
+        """Check whether an object exists"""
+        try:
+            return await run_db(self.supabase.storage.from_(self.bucket).exists, path)
+        except Exception:
+            return False
+    
+    async def upload_blob(self, content_hash: str, file_content: Union[bytes, BinaryIO]) -> str:
+        """
+        Store PDF content under its hash, unless identical content is already stored.
+        
+        Args:
+            content_hash: SHA-256 hex digest of the content
+            file_content: PDF bytes or an open file
+        
+        Returns:
+            Storage path of the blob
+        """
+        path = self.get_blob_path(content_hash)
+        if not await self.exists(path):
+            await self._upload(path, file_content)
         
+        # The uploader is about to view it and the extract job to read it
+        if isinstance(file_content, bytes):
+            await asyncio.to_thread(self.cache.put, path, file_content)
+        else:
+            await asyncio.to_thread(self.cache.put_file, path, file_content)
+        
+        return path
+    
+    async def _upload(self, path: str, file_content: Union[bytes, BinaryIO]) -> None:
         try:
-            # Upload to Supabase Storage
-            result = self.supabase.storage.from_(self.bucket).upload(
+            # Upsert: a concurrent upload of the same content writes the same bytes
+            result = await run_db(partial(
+                self.supabase.storage.from_(self.bucket).upload,
                 path=path,
                 file=file_content,
-                file_options={"content-type": "application/pdf"}
-            )
-            print(f"Upload result: {result}")
-        except Exception as e:
-            print(f"Upload error: {e}")
+                file_options={"content-type": "application/pdf", "upsert": "true"}
+            ))
+        except Exception:
+            logger.exception("Failed to upload %s", path)
             raise
-        
-        return path
+        logger.debug("Uploaded %s: %s", path, result)
     
-    async def delete_pdf(self, user_id: str, pdf_id: str) -> None:
-        """Delete PDF from storage"""
-        path = self.get_storage_path(user_id, pdf_id)
-        self.supabase.storage.from_(self.bucket).remove([path])
+    async def delete(self, path: str) -> None:
+        """Delete an object from storage"""
+        await asyncio.to_thread(self.cache.invalidate, path)
+        self.signed_urls.invalidate(path)
+        await run_db(self.supabase.storage.from_(self.bucket).remove, [path])
     
-    async def get_pdf_url(self, user_id: str, pdf_id: str, expires_in: int = 3600) -> str:
-        """Get signed URL for PDF"""
-        path = self.get_storage_path(user_id, pdf_id)
-        
+    async def move(self, from_path: str, to_path: str) -> None:
+        """Move an object within the bucket"""
+        await asyncio.to_thread(self.cache.invalidate, from_path)
+        self.signed_urls.invalidate(from_path)
+        await run_db(self.supabase.storage.from_(self.bucket).move, from_path, to_path)
+    
+    async def get_signed_url(self, path: str, expires_in: int = 3600) -> str:
+        """Get signed URL for an object"""
         # Create signed URL
-        response = self.supabase.storage.from_(self.bucket).create_signed_url(
+        response = await run_db(partial(
+            self.supabase.storage.from_(self.bucket).create_signed_url,
             path=path,
             expires_in=expires_in
-        )
+        ))
         
         # Response can be either a dict or object with signedURL attribute
         if isinstance(response, dict):
             return response.get("signedURL") or response.get("signed_url")
         return response
     
-    async def download_pdf(self, user_id: str, pdf_id: str) -> bytes:
-        """Download PDF content"""
-        path = self.get_storage_path(user_id, pdf_id)
-        
-        response = self.supabase.storage.from_(self.bucket).download(path)
-        return response
+    async def get_cached_signed_url(self, path: str) -> str:
+        """Get a signed URL for an object, reusing one with enough lifetime left"""
+        url = self.signed_urls.get(path)
+        if url is None:
+            expires_in = self.settings.PDF_SIGNED_URL_TTL
+            expires_at = time.time() + expires_in
+            url = await self.get_signed_url(path, expires_in)
+            self.signed_urls.put(path, url, expires_at)
+        return url
+    
+    async def download(self, path: str) -> bytes:
+        """Download object content, from the blob cache when possible"""
+        content = await asyncio.to_thread(self.cache.get, path)
+        if content is None:
+            content = await self._fetch(path)
+        return content
+    
+    async def open(self, path: str) -> BinaryIO:
+        """Open object content as a seekable file for serving"""
+        file = await asyncio.to_thread(self.cache.open, path)
+        if file is None:
+            file = BytesIO(await self._fetch(path))
+        return file
+    
+    async def _fetch(self, path: str) -> bytes:
+        content = await run_db(self.supabase.storage.from_(self.bucket).download, path)
+        self.cache.record_storage_read(len(content))
+        await asyncio.to_thread(self.cache.put, path, content)
+        return content
@@ -0,0 +1,168 @@
+"""Streaming multipart parsing of PDF uploads"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Dict, Optional
+
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from starlette.requests import Request
+
+# Room for the multipart framing and the small form fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+MAX_FIELD_BYTES = 16 * 1024
+
+
+class UploadRejected(Exception):
+    """The upload is malformed or too large"""
+    
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SpooledUpload:
+    """An uploaded file written to a temporary file, with its size and SHA-256"""
+    
+    def __init__(self, spool_dir: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(suffix=".upload", dir=spool_dir)
+        self._file: Optional[BinaryIO] = os.fdopen(fd, "wb")
+        self._sha256 = hashlib.sha256()
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.size = 0
+        self.sha256: Optional[str] = None
+    
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._sha256.update(data)
+        self.size += len(data)
+    
+    def finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.sha256 = self._sha256.hexdigest()
+    
+    def open(self) -> BinaryIO:
+        """Open the spooled file for reading"""
+        return open(self.path, "rb")
+    
+    def close(self) -> None:
+        """Delete the spool file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+    
+    def __enter__(self) -> "SpooledUpload":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def receive_upload(
+    request: Request,
+    file_field: str,
+    max_bytes: int,
+    spool_dir: Optional[str] = None
+) -> SpooledUpload:
+    """
+    Stream a multipart/form-data body to a spool file.
+    
+    The file part is written in the chunks it arrives in and hashed on the
+    way, so memory use does not grow with the file size. Small text fields
+    are kept in `fields`.
+    
+    Args:
+        request: Incoming request
+        file_field: Name of the form field holding the file
+        max_bytes: Largest accepted file size
+        spool_dir: Directory for the spool file (system temp dir by default)
+    
+    Returns:
+        SpooledUpload; the caller must close() it
+    
+    Raises:
+        UploadRejected: If the body is not multipart, has no file, or the file
+            (or the declared Content-Length) exceeds max_bytes
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejected("Expected a multipart/form-data upload")
+    
+    # Refuse obviously oversized bodies before reading any of them
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise UploadRejected("File too large", status_code=413)
+    
+    upload = SpooledUpload(spool_dir)
+    part = {}
+    
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, header_field=b"", header_value=b"", name=None, is_file=False, value=bytearray())
+    
+    def on_header_field(data: bytes, start: int, end: int):
+        part["header_field"] += data[start:end]
+    
+    def on_header_value(data: bytes, start: int, end: int):
+        part["header_value"] += data[start:end]
+    
+    def on_header_end():
+        part["headers"][part["header_field"].lower()] = part["header_value"]
+        part["header_field"] = b""
+        part["header_value"] = b""
+    
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["name"] = options.get(b"name", b"").decode("utf-8", "replace")
+        if part["name"] == file_field and b"filename" in options:
+            part["is_file"] = True
+            upload.filename = options[b"filename"].decode("utf-8", "replace")
+    
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["is_file"]:
+            if upload.size + (end - start) > max_bytes:
+                raise UploadRejected("File too large", status_code=413)
+            upload.write(data[start:end])
+        else:
+            part["value"] += data[start:end]
+            if len(part["value"]) > MAX_FIELD_BYTES:
+                raise UploadRejected(f"Form field {part['name']} is too large")
+    
+    def on_part_end():
+        if not part["is_file"] and part["name"]:
+            upload.fields[part["name"]] = part["value"].decode("utf-8", "replace")
+    
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        upload.finish()
+    except UploadRejected:
+        upload.close()
+        raise
+    except Exception as e:
+        upload.close()
+        raise UploadRejected(f"Malformed upload: {str(e)}")
+    
+    if upload.filename is None:
+        upload.close()
+        raise UploadRejected(f"Missing file field: {file_field}")
+    
+    return upload
@@ -0,0 +1,159 @@
+"""Cache of compact per-set answer keys for quiz grading"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
+from typing import List, Optional
+
+from app.config import get_settings
+
+# Columns needed to grade a set and render its results
+ANSWER_KEY_COLUMNS = "id, idx, question, choice_a, choice_b, choice_c, choice_d, answer, explanation"
+
+
+class AnswerKey:
+    """Correct answers and result payloads of one MCQ set, in idx order"""
+    
+    def __init__(self, mcq_set_id: str, pdf_id: str, questions: List[dict]):
+        self.mcq_set_id = mcq_set_id
+        self.pdf_id = pdf_id
+        self.questions = questions
+    
+    def to_json(self) -> str:
+        return json.dumps({"mcq_set_id": self.mcq_set_id, "pdf_id": self.pdf_id, "questions": self.questions})
+    
+    @classmethod
+    def from_json(cls, payload: str) -> "AnswerKey":
+        data = json.loads(payload)
+        return cls(data["mcq_set_id"], data["pdf_id"], data["questions"])
+
+
+class SharedAnswerKeyStore:
+    """
+    SQLite file of answer keys shared by every process on the host.
+    
+    Lets several web workers grade a set after only one of them has read it
+    from the database. Methods block on SQLite; call them from a worker thread.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answer_keys ("
+                "mcq_set_id TEXT PRIMARY KEY, "
+                "pdf_id TEXT NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answer_keys_pdf_id ON answer_keys(pdf_id)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    def get(self, mcq_set_id: str) -> Optional[AnswerKey]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM answer_keys WHERE mcq_set_id = ?", (mcq_set_id,)
+            ).fetchone()
+        return AnswerKey.from_json(row[0]) if row else None
+    
+    def put(self, key: AnswerKey) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_keys (mcq_set_id, pdf_id, payload) VALUES (?, ?, ?)",
+                (key.mcq_set_id, key.pdf_id, key.to_json())
+            )
+    
+    def delete_for_pdf(self, pdf_id: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM answer_keys WHERE pdf_id = ?", (pdf_id,))
+
+
+class AnswerKeyCache:
+    """
+    In-process LRU of answer keys keyed by mcq_set_id, optionally backed by a
+    SharedAnswerKeyStore.
+    
+    Only finished sets belong here: their questions never change, so entries
+    only need dropping when the PDF (and with it the set) is deleted.
+    """
+    
+    def __init__(self, max_entries: int, shared: Optional[SharedAnswerKeyStore] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, AnswerKey]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+    
+    async def get(self, mcq_set_id: str) -> Optional[AnswerKey]:
+        """Return the cached answer key for a set, or None on a miss"""
+        with self._lock:
+            key = self._entries.get(mcq_set_id)
+            if key is not None:
+                self._entries.move_to_end(mcq_set_id)
+                self.hits += 1
+                return key
+        
+        if self.shared is not None:
+            key = await asyncio.to_thread(self.shared.get, mcq_set_id)
+            if key is not None:
+                self._remember(key)
+                with self._lock:
+                    self.shared_hits += 1
+                return key
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    async def put(self, key: AnswerKey) -> None:
+        """Cache the answer key of a finished set"""
+        self._remember(key)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.put, key)
+    
+    def _remember(self, key: AnswerKey) -> None:
+        with self._lock:
+            self._entries[key.mcq_set_id] = key
+            self._entries.move_to_end(key.mcq_set_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    async def invalidate_pdf(self, pdf_id: str) -> None:
+        """Drop the answer keys of every set generated from a PDF"""
+        with self._lock:
+            for mcq_set_id in [k for k, v in self._entries.items() if v.pdf_id == pdf_id]:
+                del self._entries[mcq_set_id]
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.delete_for_pdf, pdf_id)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses
+            }
+
+
+@lru_cache()
+def get_answer_key_cache() -> AnswerKeyCache:
+    """Get the process-wide answer key cache"""
+    settings = get_settings()
+    shared = None
+    if settings.ANSWER_KEY_CACHE_SHARED:
+        shared = SharedAnswerKeyStore(os.path.join(settings.DATA_DIR, "answer_keys.sqlite3"))
+    return AnswerKeyCache(settings.ANSWER_KEY_CACHE_ENTRIES, shared)
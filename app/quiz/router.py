@@ -1,13 +1,11 @@
 """Quiz routes"""
-import json
-import base64
-from urllib.parse import quote
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from supabase import Client
 
 from app.config import get_settings, Settings
+from app.db import execute
 from app.deps import get_supabase_client, get_current_user_id
 from app.quiz.service import QuizService
 from app.mcq.service import MCQService
@@ -29,12 +27,12 @@ async def take_quiz(
     quiz_service = QuizService(supabase, settings)
     
     # Get PDF
-    pdf_response = supabase.table("pdfs").select("*").eq("id", pdf_id).eq("user_id", user_id).single().execute()
+    pdf_response = await execute(supabase.table("pdfs").select("*").eq("id", pdf_id).eq("user_id", user_id).single())
     pdf = pdf_response.data
     if not pdf:
         raise HTTPException(status_code=404, detail="PDF not found")
     
-    # Get latest completed MCQ set
+    # Get latest MCQ set with questions (may still be generating)
     latest_mcq_set = await mcq_service.get_latest_mcq_set(pdf_id, user_id)
     if not latest_mcq_set:
         raise HTTPException(
@@ -71,7 +69,7 @@ async def submit_quiz(
         raise HTTPException(status_code=400, detail="MCQ set ID required")
     
     # Verify MCQ set belongs to user
-    mcq_set_response = supabase.table("mcq_sets").select("*").eq("id", mcq_set_id).eq("user_id", user_id).single().execute()
+    mcq_set_response = await execute(supabase.table("mcq_sets").select("*").eq("id", mcq_set_id).eq("user_id", user_id).single())
     if not mcq_set_response.data:
         raise HTTPException(status_code=404, detail="MCQ set not found")
     
@@ -82,45 +80,45 @@ async def submit_quiz(
             mcq_id = key.replace("answer_", "")
             answers[mcq_id] = value
     
-    # Check answers
-    results = await quiz_service.check_answers(mcq_set_id, answers)
+    # Grade only the questions that were shown; a partial set may have grown since
+    # Forms without the field (from before it existed) grade the whole set
+    mcq_ids = form_data.getlist("mcq_id") if "mcq_id" in form_data else None
     
-    # Encode results as base64 to pass via URL
-    results_json = json.dumps(results)
-    results_b64 = base64.b64encode(results_json.encode()).decode()
+    # Grade and store the attempt; the results page rebuilds details from the answer key
+    attempt = await quiz_service.create_quiz_attempt(mcq_set_response.data, user_id, answers, mcq_ids)
+    attempt_url = f"/quiz/attempts/{attempt['id']}"
     
-    # Redirect with encoded results in URL
-    response = RedirectResponse(
-        url=f"/quiz/results?mcq_set_id={mcq_set_id}&data={quote(results_b64)}",
-        status_code=303
-    )
-    return response
+    # Script submissions navigate themselves; a followed redirect would render the results twice
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse({"url": attempt_url})
+    return RedirectResponse(url=attempt_url, status_code=303)
 
 
-@router.get("/quiz/results", response_class=HTMLResponse)
+@router.get("/quiz/attempts/{attempt_id}", response_class=HTMLResponse)
 async def quiz_results(
     request: Request,
-    mcq_set_id: str,
-    data: str,
+    attempt_id: str,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_supabase_client),
     settings: Settings = Depends(get_settings)
 ):
-    """Display quiz results"""
-    try:
-        # Decode results from URL parameter
-        results_json = base64.b64decode(data.encode()).decode()
-        results = json.loads(results_json)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail="Invalid results data")
+    """Display the results of a stored quiz attempt"""
+    quiz_service = QuizService(supabase, settings)
+    
+    attempt = await quiz_service.get_quiz_attempt(attempt_id, user_id)
+    if not attempt:
+        raise HTTPException(status_code=404, detail="Quiz attempt not found")
     
     # Get MCQ set and PDF info
-    mcq_set_response = supabase.table("mcq_sets").select("*, pdfs(*)").eq("id", mcq_set_id).single().execute()
+    mcq_set_response = await execute(supabase.table("mcq_sets").select("*, pdfs(*)").eq("id", attempt["mcq_set_id"]).single())
     mcq_set = mcq_set_response.data
     
+    results = await quiz_service.get_attempt_results(attempt, mcq_set)
+    
     return templates.TemplateResponse("quiz_result.html", {
         "request": request,
         "results": results,
+        "attempt": attempt,
         "mcq_set": mcq_set,
         "pdf": mcq_set.get("pdfs")
     })
@@ -1,10 +1,12 @@
 """Quiz service for managing quiz attempts"""
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 from uuid import uuid4
 from supabase import Client
 
 from app.config import Settings
+from app.db import execute
+from app.quiz.answer_key import ANSWER_KEY_COLUMNS, AnswerKey, get_answer_key_cache
 
 
 class QuizService:
@@ -12,23 +14,77 @@ class QuizService:
         self.supabase = supabase
         self.settings = settings
     
-    async def create_quiz_attempt(self, mcq_set_id: str, user_id: str) -> dict:
-        """Create a new quiz attempt"""
-        mcq_set_response = self.supabase.table("mcq_sets").select("*").eq("id", mcq_set_id).eq("user_id", user_id).single().execute()
-        return mcq_set_response.data
+    async def create_quiz_attempt(
+        self,
+        mcq_set: dict,
+        user_id: str,
+        answers: dict,
+        mcq_ids: Optional[List[str]] = None
+    ) -> dict:
+        """Grade a submission and store the answers and score as a quiz attempt"""
+        results = await self.check_answers(mcq_set, answers, mcq_ids)
+        graded = results["results"]
+        
+        attempt_data = {
+            "id": str(uuid4()),
+            "mcq_set_id": mcq_set["id"],
+            "user_id": user_id,
+            "mcq_ids": [r["mcq_id"] for r in graded],
+            "answers": {r["mcq_id"]: r["user_answer"] for r in graded if r["user_answer"]},
+            "correct_count": results["correct_count"],
+            "total_questions": results["total_questions"],
+            "score_percentage": results["score_percentage"],
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        response = await execute(self.supabase.table("quiz_attempts").insert(attempt_data))
+        return response.data[0]
+    
+    async def get_quiz_attempt(self, attempt_id: str, user_id: str) -> Optional[dict]:
+        """Get a quiz attempt by ID"""
+        response = await execute(
+            self.supabase.table("quiz_attempts").select("*").eq("id", attempt_id).eq("user_id", user_id).limit(1)
+        )
+        return response.data[0] if response.data else None
+    
+    async def get_attempt_results(self, attempt: dict, mcq_set: dict) -> dict:
+        """Rebuild the graded results of a stored attempt from the set's answer key"""
+        return await self.check_answers(mcq_set, attempt["answers"], attempt["mcq_ids"])
     
     async def get_mcqs_for_quiz(self, mcq_set_id: str) -> List[dict]:
         """Get MCQs for a quiz (without answers)"""
-        response = self.supabase.table("mcqs").select(
+        response = await execute(self.supabase.table("mcqs").select(
             "id, idx, question, choice_a, choice_b, choice_c, choice_d, difficulty"
-        ).eq("mcq_set_id", mcq_set_id).order("idx").execute()
+        ).eq("mcq_set_id", mcq_set_id).order("idx"))
         return response.data
     
-    async def check_answers(self, mcq_set_id: str, answers: dict) -> dict:
-        """Check user answers against correct answers"""
-        # Get all MCQs with answers
-        mcqs_response = self.supabase.table("mcqs").select("*").eq("mcq_set_id", mcq_set_id).order("idx").execute()
-        mcqs = mcqs_response.data
+    async def get_answer_key(self, mcq_set: dict) -> AnswerKey:
+        """Get the answer key of a set, read through the cache once the set is done"""
+        cache = get_answer_key_cache()
+        # Partial sets are still growing, so only finished ones are cached
+        cacheable = mcq_set["status"] == "done"
+        
+        if cacheable:
+            answer_key = await cache.get(mcq_set["id"])
+            if answer_key is not None:
+                return answer_key
+        
+        response = await execute(
+            self.supabase.table("mcqs").select(ANSWER_KEY_COLUMNS).eq("mcq_set_id", mcq_set["id"]).order("idx")
+        )
+        answer_key = AnswerKey(mcq_set["id"], mcq_set["pdf_id"], response.data)
+        
+        if cacheable:
+            await cache.put(answer_key)
+        return answer_key
+    
+    async def check_answers(self, mcq_set: dict, answers: dict, mcq_ids: Optional[List[str]] = None) -> dict:
+        """Check user answers against correct answers, limited to `mcq_ids` if given"""
+        answer_key = await self.get_answer_key(mcq_set)
+        mcqs = answer_key.questions
+        if mcq_ids is not None:
+            shown = set(mcq_ids)
+            mcqs = [mcq for mcq in mcqs if mcq["id"] in shown]
         
         results = []
         correct_count = 0
@@ -118,8 +118,8 @@ async function handleGenerate(event, pdfId) {
         
         if (response.ok) {
             const data = await response.json();
-            // Start polling for status
-            pollGenerationStatus(data.mcq_set.id);
+            // Follow generation progress
+            watchGenerationProgress(data.mcq_set.id, data.mcq_set.status);
         } else {
             const error = await response.json();
             alert(error.detail || 'Generation failed');
@@ -133,15 +133,64 @@ async function handleGenerate(event, pdfId) {
     }
 }
 
+// Stream MCQ generation progress, falling back to polling without EventSource
+function watchGenerationProgress(mcqSetId, initialStatus) {
+    if (!window.EventSource) {
+        pollGenerationStatus(mcqSetId, initialStatus);
+        return;
+    }
+    
+    const stageLabels = {
+        loading: 'Reading PDF',
+        fact_extraction: 'Extracting facts',
+        generation: 'Generating MCQs',
+        validation: 'Validating MCQs',
+        persistence: 'Saving MCQs'
+    };
+    const source = new EventSource(`/api/mcq-sets/${mcqSetId}/events`);
+    
+    source.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        
+        // Reload once the first questions are saved so the quiz link shows up
+        if (event.status === 'done' || event.status === 'failed' ||
+            (event.status === 'partial' && initialStatus !== 'partial')) {
+            source.close();
+            window.location.reload();
+            return;
+        }
+        
+        const statusEl = document.getElementById('generationStatus');
+        if (statusEl && event.stage) {
+            let text = stageLabels[event.stage] || 'Generating MCQs';
+            if (event.total) {
+                text += ` (${event.completed}/${event.total})`;
+            }
+            if (event.mcq_count) {
+                text += `, ${event.mcq_count} ready`;
+            }
+            statusEl.innerHTML = `<span class="spinner"></span> ${text}...`;
+        }
+    };
+    
+    source.onerror = () => {
+        // EventSource reconnects on its own unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            pollGenerationStatus(mcqSetId, initialStatus);
+        }
+    };
+}
+
 // Poll for MCQ generation status
-function pollGenerationStatus(mcqSetId) {
+function pollGenerationStatus(mcqSetId, initialStatus) {
     const pollInterval = setInterval(async () => {
         try {
             const response = await fetch(`/api/mcq-sets/${mcqSetId}`);
             const data = await response.json();
             const status = data.mcq_set.status;
             
-            if (status === 'done' || status === 'failed') {
+            if (status === 'done' || status === 'failed' ||
+                (status === 'partial' && initialStatus !== 'partial')) {
                 clearInterval(pollInterval);
                 window.location.reload();
             }
@@ -163,11 +212,14 @@ async function handleQuizSubmit(event) {
     try {
         const response = await fetch('/api/quiz/submit', {
             method: 'POST',
+            headers: { 'Accept': 'application/json' },
             body: formData
         });
         
         if (response.ok) {
-            window.location.href = '/quiz/results';
+            // Open the stored attempt
+            const data = await response.json();
+            window.location.href = data.url;
         } else {
             const error = await response.json();
             alert(error.detail || 'Submission failed');
@@ -0,0 +1,99 @@
+"""
+Benchmark the streaming chunker against the previous list-based implementation.
+
+Usage:
+    python -m benchmarks.bench_chunking [--words 1000000] [--json]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.mcq.pipeline.chunking import TextChunk, chunk_text
+from benchmarks.synthetic import make_pages
+
+
+def legacy_chunk_text(
+    pages: Dict[int, str],
+    target_words: int = 1000,
+    overlap_words: int = 100
+) -> List[TextChunk]:
+    """The original implementation with a per-word page list, kept as a reference"""
+    chunks = []
+    chunk_id = 0
+    combined_text = []
+    word_to_page = []
+    
+    for page_num in sorted(pages.keys()):
+        words = pages[page_num].split()
+        combined_text.extend(words)
+        word_to_page.extend([page_num] * len(words))
+    
+    start_idx = 0
+    while start_idx < len(combined_text):
+        end_idx = min(start_idx + target_words, len(combined_text))
+        chunks.append(TextChunk(
+            text=" ".join(combined_text[start_idx:end_idx]),
+            page_numbers=sorted(set(word_to_page[start_idx:end_idx])),
+            chunk_id=f"chunk_{chunk_id}"
+        ))
+        chunk_id += 1
+        start_idx = end_idx - overlap_words
+        if end_idx >= len(combined_text):
+            break
+    
+    return chunks
+
+
+def _measure(consume) -> dict:
+    # Time and memory are measured in separate runs since tracemalloc slows allocation
+    started = time.perf_counter()
+    count = consume()
+    elapsed = time.perf_counter() - started
+    
+    tracemalloc.start()
+    consume()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"chunks": count, "seconds": round(elapsed, 4), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    
+    pages = make_pages(max(1, args.words // args.words_per_page), args.words_per_page)
+    # Leave a few pages empty so page resolution is exercised
+    for page_num in list(pages)[::97]:
+        pages[page_num] = ""
+    
+    # Outputs must be identical before timings mean anything
+    legacy = [c.to_dict() for c in legacy_chunk_text(pages)]
+    streaming = [c.to_dict() for c in chunk_text(pages)]
+    assert legacy == streaming, "streaming chunker diverged from the legacy boundaries"
+    del legacy, streaming
+    
+    results = {
+        "words": sum(len(t.split()) for t in pages.values()),
+        "legacy": _measure(lambda: len(legacy_chunk_text(pages))),
+        # Consume one chunk at a time, as a streaming consumer would
+        "streaming": _measure(lambda: sum(1 for _ in chunk_text(pages)))
+    }
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{results['words']} words")
+    print(f"{'impl':>10} {'chunks':>7} {'seconds':>8} {'peak MB':>8}")
+    for name in ("legacy", "streaming"):
+        r = results[name]
+        print(f"{name:>10} {r['chunks']:>7} {r['seconds']:>8.3f} {r['peak_mb']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Load test the API against a slow in-memory Supabase.
+
+Requests run through the real FastAPI app over an in-process ASGI transport,
+with every Supabase call sleeping for --db-latency-ms like a network round
+trip. --blocking runs those calls directly on the event loop, as the services
+did before database calls moved to a thread pool, for comparison.
+
+Usage:
+    python -m benchmarks.bench_load [--concurrency 1 10 50] [--requests 200] \
+        [--db-latency-ms 20] [--blocking] [--json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from statistics import median
+from uuid import uuid4
+
+import httpx
+
+import app.db as db
+from app.config import get_settings
+from app.deps import get_current_user_id
+from app.main import app
+from benchmarks.fakes import FakeSupabase
+
+USER_ID = str(uuid4())
+
+
+def _seed(supabase: FakeSupabase, mcq_count: int) -> str:
+    pdf_id, mcq_set_id = str(uuid4()), str(uuid4())
+    supabase.tables["pdfs"] = [{"id": pdf_id, "user_id": USER_ID, "title": "load", "storage_path": ""}]
+    supabase.tables["mcq_sets"] = [{
+        "id": mcq_set_id, "pdf_id": pdf_id, "user_id": USER_ID, "model": "fake",
+        "requested_count": mcq_count, "status": "done"
+    }]
+    supabase.tables["mcqs"] = [
+        {
+            "id": str(uuid4()), "mcq_set_id": mcq_set_id, "idx": idx,
+            "question": f"Question {idx}?", "choice_a": "a", "choice_b": "b",
+            "choice_c": "c", "choice_d": "d", "answer": "A", "explanation": ""
+        }
+        for idx in range(mcq_count)
+    ]
+    return mcq_set_id
+
+
+async def _run_level(client: httpx.AsyncClient, path: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    remaining = total
+    
+    async def user():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    latencies_ms = sorted(t * 1000 for t in latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies_ms),
+        "requests_per_s": round(len(latencies_ms) / elapsed, 1),
+        "median_ms": round(median(latencies_ms), 2),
+        "p95_ms": round(latencies_ms[int(len(latencies_ms) * 0.95) - 1], 2)
+    }
+
+
+async def main_async(args) -> list:
+    supabase = FakeSupabase(latency_ms=args.db_latency_ms)
+    mcq_set_id = _seed(supabase, args.mcqs)
+    path = f"/api/mcq-sets/{mcq_set_id}/mcqs"
+    
+    # The ASGI transport does not run the lifespan, so wire the app up by hand
+    app.state.supabase = supabase
+    app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+    
+    if args.blocking:
+        async def run_db(fn, *fn_args):
+            return fn(*fn_args)
+        db.run_db = run_db
+    
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        for concurrency in args.concurrency:
+            result = await _run_level(client, path, concurrency, args.requests)
+            result["mode"] = "blocking" if args.blocking else "thread_pool"
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--db-latency-ms", type=float, default=20.0)
+    parser.add_argument("--mcqs", type=int, default=50, help="Questions in the seeded set")
+    parser.add_argument("--blocking", action="store_true", help="Run Supabase calls on the event loop")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps({"db_threadpool_size": get_settings().DB_THREADPOOL_SIZE, "results": results}, indent=2))
+        return
+    
+    print(f"{'mode':>12} {'conc':>5} {'req/s':>8} {'median ms':>10} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:>12} {r['concurrency']:>5} {r['requests_per_s']:>8} {r['median_ms']:>10} {r['p95_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark serial vs process-pool PDF text extraction.
+
+Usage:
+    python -m benchmarks.bench_pdf_extract [--pages 50 200 800] [--workers 4] [--json]
+"""
+import argparse
+import json
+import os
+import time
+
+from app.mcq.pipeline.pdf_extract import extract_text_from_pdf
+from benchmarks.synthetic import make_pdf
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    
+    # Warm the pool so process start-up is not charged to the first run
+    warmup = make_pdf(args.workers * 2, words_per_page=50)
+    extract_text_from_pdf(warmup, workers=args.workers, parallel_min_pages=1)
+    
+    results = []
+    for page_count in args.pages:
+        pdf_bytes = make_pdf(page_count)
+        serial = _time(lambda: extract_text_from_pdf(pdf_bytes), args.repeat)
+        parallel = _time(
+            lambda: extract_text_from_pdf(pdf_bytes, workers=args.workers, parallel_min_pages=1),
+            args.repeat
+        )
+        assert extract_text_from_pdf(pdf_bytes) == extract_text_from_pdf(
+            pdf_bytes, workers=args.workers, parallel_min_pages=1
+        )
+        results.append({
+            "pages": page_count,
+            "workers": args.workers,
+            "serial_s": round(serial, 4),
+            "parallel_s": round(parallel, 4),
+            "speedup": round(serial / parallel, 2) if parallel else None
+        })
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'pages':>6} {'workers':>7} {'serial s':>9} {'parallel s':>10} {'speedup':>7}")
+    for r in results:
+        print(f"{r['pages']:>6} {r['workers']:>7} {r['serial_s']:>9.3f} {r['parallel_s']:>10.3f} {r['speedup']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+End-to-end benchmark of run_mcq_generation_pipeline.
+
+Synthetic PDFs are rendered with PyMuPDF, Supabase is replaced by an
+in-memory fake and the LLM by the deterministic fake backend, each with
+configurable latency. Per-stage wall time, CPU time, peak traced memory and
+call counts are reported as JSON.
+
+Usage:
+    python -m benchmarks.bench_pipeline --pages 10 100 1000 --counts 10 50 \\
+        --llm-latency-ms 200 --db-latency-ms 5 --output results.json
+
+`--llm-cache` picks the live-mode LLM response cache: "default" uses the
+configured LLM_CACHE_ENABLED, as production would, and "on"/"off" force it.
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from uuid import uuid4
+
+# Configure the app for offline runs before anything reads settings
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="bench-pipeline-"))
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_MODE"] = "live"
+
+import app.mcq.pipeline as pipeline
+import app.mcq.pipeline.page_text as page_text
+from app.config import get_settings
+from app.llm.gateway import get_llm_gateway
+from app.mcq.pipeline.fact_cache import get_fact_cache
+from app.mcq.pipeline.page_text import get_page_text_store
+from app.mcq.pipeline import persistence
+from app.pdfs.blob_cache import get_blob_cache
+from app.pdfs.storage import StorageService
+from benchmarks.fakes import FakeSupabase
+from benchmarks.synthetic import make_pdf
+
+# The live-mode response cache as configured, for --llm-cache default
+DEFAULT_LLM_CACHE_ENABLED = get_settings().LLM_CACHE_ENABLED
+
+# (module, attribute, stage name) for every stage the pipeline calls by name
+STAGES = [
+    (StorageService, "download", "download"),
+    (page_text, "extract_text_from_pdf", "extract_text"),
+    (pipeline, "chunk_text", "chunking"),
+    (pipeline, "chunk_text_by_tokens", "chunking"),
+    (pipeline, "extract_facts_from_chunks", "fact_extraction"),
+    (pipeline, "deduplicate_facts", "dedup"),
+    (pipeline, "generate_mcqs_from_facts", "generation"),
+    (pipeline, "validate_and_repair_mcqs", "validation"),
+    (persistence, "persist_mcqs", "persistence"),
+]
+
+
+class StageRecorder:
+    """Accumulates wall time, CPU time, peak memory and call counts per stage"""
+    
+    def __init__(self, supabase: FakeSupabase, trace_memory: bool):
+        self.supabase = supabase
+        self.trace_memory = trace_memory
+        self.peak_mb = 0.0
+        self.first_finished = {}
+        self.stages = defaultdict(lambda: {
+            "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": 0.0, "calls": 0,
+            "llm_requests": 0, "db_calls": Counter()
+        })
+    
+    def _start(self) -> tuple:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        llm = get_llm_gateway()
+        return (time.perf_counter(), time.process_time(), llm.requests, Counter(self.supabase.calls))
+    
+    def _stop(self, name: str, started: tuple) -> None:
+        wall, cpu, llm_requests, db_calls = started
+        stage = self.stages[name]
+        stage["wall_s"] += time.perf_counter() - wall
+        stage["cpu_s"] += time.process_time() - cpu
+        stage["calls"] += 1
+        self.first_finished.setdefault(name, time.perf_counter())
+        stage["llm_requests"] += get_llm_gateway().requests - llm_requests
+        stage["db_calls"].update(self.supabase.calls - db_calls)
+        if self.trace_memory:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            stage["peak_mb"] = max(stage["peak_mb"], peak_mb)
+            self.peak_mb = max(self.peak_mb, peak_mb)
+    
+    def wrap(self, fn, name: str):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = self._start()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self._stop(name, started)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = self._start()
+            try:
+                result = fn(*args, **kwargs)
+                # Generators do their work while being consumed
+                return list(result) if name == "chunking" else result
+            finally:
+                self._stop(name, started)
+        return wrapper
+    
+    def report(self) -> dict:
+        return {
+            name: {
+                "wall_s": round(s["wall_s"], 4),
+                "cpu_s": round(s["cpu_s"], 4),
+                "peak_mb": round(s["peak_mb"], 2) if self.trace_memory else None,
+                "calls": s["calls"],
+                "llm_requests": s["llm_requests"],
+                "db_calls": dict(s["db_calls"])
+            }
+            for name, s in self.stages.items()
+        }
+
+
+def _reset_local_state(run_dir: str, args) -> None:
+    """Point caches and artifacts at a fresh directory so runs start cold"""
+    settings = get_settings()
+    settings.DATA_DIR = run_dir
+    settings.LLM_CACHE_ENABLED = {
+        "default": DEFAULT_LLM_CACHE_ENABLED, "on": True, "off": False
+    }[args.llm_cache]
+    get_fact_cache.cache_clear()
+    get_page_text_store.cache_clear()
+    get_blob_cache.cache_clear()
+    get_llm_gateway.cache_clear()
+
+
+async def run_once(pdf_bytes: bytes, page_count: int, requested_count: int, args, run_dir: str) -> dict:
+    settings = get_settings()
+    settings.LLM_FAKE_LATENCY_MS = args.llm_latency_ms
+    
+    supabase = FakeSupabase(latency_ms=args.db_latency_ms, storage_latency_ms=args.storage_latency_ms)
+    user_id, pdf_id, mcq_set_id = str(uuid4()), str(uuid4()), str(uuid4())
+    content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    storage_path = StorageService(supabase, settings).get_blob_path(content_hash)
+    supabase.storage.from_(settings.PDF_BUCKET).upload(storage_path, pdf_bytes)
+    supabase.tables["pdfs"] = [{
+        "id": pdf_id, "user_id": user_id, "title": "bench",
+        "storage_path": storage_path, "content_hash": content_hash
+    }]
+    supabase.tables["mcq_sets"] = [{
+        "id": mcq_set_id, "pdf_id": pdf_id, "user_id": user_id, "model": settings.OPENAI_MODEL,
+        "requested_count": requested_count, "status": "queued"
+    }]
+    supabase.calls.clear()
+    
+    # The gateway lives across the cold and warm runs; report this run's share
+    llm = get_llm_gateway()
+    llm_requests, llm_backend_calls = llm.requests, llm.backend_calls
+    
+    recorder = StageRecorder(supabase, trace_memory=args.trace_memory)
+    originals = [(owner, attr, getattr(owner, attr)) for owner, attr, _ in STAGES]
+    for owner, attr, name in STAGES:
+        setattr(owner, attr, recorder.wrap(getattr(owner, attr), name))
+    
+    error = None
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        await pipeline.run_mcq_generation_pipeline(
+            mcq_set_id=mcq_set_id,
+            pdf_id=pdf_id,
+            user_id=user_id,
+            requested_count=requested_count,
+            model=settings.OPENAI_MODEL,
+            supabase=supabase,
+            settings=settings
+        )
+    except Exception as e:
+        error = str(e)
+    finally:
+        peak_mb = None
+        if args.trace_memory:
+            # Stages reset the tracked peak, so combine theirs with what is left
+            peak_mb = max(recorder.peak_mb, tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+            tracemalloc.stop()
+        for owner, attr, fn in originals:
+            setattr(owner, attr, fn)
+    
+    mcq_set = supabase.tables["mcq_sets"][0]
+    return {
+        "pages": page_count,
+        "requested_count": requested_count,
+        "status": mcq_set.get("status"),
+        "error": error or mcq_set.get("error"),
+        "mcqs": len(supabase.tables.get("mcqs", [])),
+        "wall_s": round(time.perf_counter() - started_wall, 4),
+        "time_to_first_mcq_s": (
+            round(recorder.first_finished["persistence"] - started_wall, 4)
+            if "persistence" in recorder.first_finished else None
+        ),
+        "cpu_s": round(time.process_time() - started_cpu, 4),
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        "llm_requests": llm.requests - llm_requests,
+        "llm_backend_calls": llm.backend_calls - llm_backend_calls,
+        "db_calls": dict(supabase.calls),
+        "stages": recorder.report(),
+        # What the pipeline itself persisted on the mcq_sets row
+        "pipeline_metrics": mcq_set.get("metrics")
+    }
+
+
+async def main_async(args) -> list:
+    results = []
+    base_dir = get_settings().DATA_DIR
+    for page_count in args.pages:
+        pdf_bytes = make_pdf(page_count, words_per_page=args.words_per_page)
+        for requested_count in args.counts:
+            run_dir = os.path.join(base_dir, f"run-{page_count}-{requested_count}-{uuid4().hex[:6]}")
+            _reset_local_state(run_dir, args)
+            result = await run_once(pdf_bytes, page_count, requested_count, args, run_dir)
+            result["cache"] = "cold"
+            results.append(result)
+            print(f"pages={page_count} count={requested_count} cold {result['wall_s']}s", file=sys.stderr)
+            
+            if args.warm:
+                # Same local state: page text and facts are already cached
+                result = await run_once(pdf_bytes, page_count, requested_count, args, run_dir)
+                result["cache"] = "warm"
+                results.append(result)
+                print(f"pages={page_count} count={requested_count} warm {result['wall_s']}s", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--words-per-page", type=int, default=300)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--storage-latency-ms", type=float, default=50.0)
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="Skip tracemalloc, which slows allocation-heavy stages")
+    parser.add_argument("--warm", action="store_true", help="Also run each case again with warm local caches")
+    parser.add_argument("--llm-cache", choices=["default", "on", "off"], default="default",
+                        help="Live-mode LLM response cache: as configured, or forced on/off")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main_async(args))
+    output = json.dumps({"settings": vars(args), "results": results}, indent=2)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark a Supabase client per request against the shared pooled client.
+
+By default requests go to a local PostgREST stand-in over plain HTTP, which
+shows client construction and connection set-up cost. Pass --url and --key to
+measure against a real project, where TLS handshakes make the difference
+larger.
+
+Usage:
+    python -m benchmarks.bench_supabase_client [--requests 200] [--json]
+    python -m benchmarks.bench_supabase_client --url https://xyz.supabase.co --key ... --table pdfs
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median
+
+from supabase import create_client
+
+from app.config import Settings
+from app.db import create_supabase_client, close_supabase_client
+
+# Any syntactically valid JWT; the local server does not check it
+LOCAL_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.c2ln"
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def do_GET(self):
+        body = b'[{"id": "00000000-0000-0000-0000-000000000000"}]'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_local_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgrestHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _summarize(mode: str, timings: list, connections) -> dict:
+    timings_ms = sorted(t * 1000 for t in timings)
+    return {
+        "mode": mode,
+        "requests": len(timings_ms),
+        "median_ms": round(median(timings_ms), 3),
+        "p95_ms": round(timings_ms[int(len(timings_ms) * 0.95) - 1], 3),
+        "total_s": round(sum(timings_ms) / 1000, 3),
+        "connections_opened": connections
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--url", help="Supabase project URL (default: local stand-in server)")
+    parser.add_argument("--key", help="Service role key for --url")
+    parser.add_argument("--table", default="pdfs")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    
+    server = None
+    if args.url:
+        url, key = args.url, args.key
+    else:
+        server = _start_local_server()
+        url, key = f"http://127.0.0.1:{server.server_address[1]}", LOCAL_KEY
+    
+    settings = Settings()
+    settings.SUPABASE_URL = url
+    settings.SUPABASE_SERVICE_ROLE_KEY = key
+    
+    def connections():
+        return server.connections if server else None
+    
+    def query(client):
+        client.table(args.table).select("id").limit(1).execute()
+    
+    # What every request paid before: build a client, then query with it
+    timings = []
+    before = connections()
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        query(create_client(url, key))
+        timings.append(time.perf_counter() - started)
+    after = connections()
+    per_request = _summarize("client_per_request", timings, after - before if server else None)
+    
+    # Shared client, as created once at startup
+    client = create_supabase_client(settings)
+    query(client)
+    timings = []
+    before = connections()
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        query(client)
+        timings.append(time.perf_counter() - started)
+    after = connections()
+    close_supabase_client(client)
+    shared = _summarize("shared_client", timings, after - before if server else None)
+    
+    results = [per_request, shared]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'mode':>20} {'median ms':>10} {'p95 ms':>8} {'total s':>8} {'connections':>11}")
+    for r in results:
+        print(
+            f"{r['mode']:>20} {r['median_ms']:>10} {r['p95_ms']:>8} {r['total_s']:>8} "
+            f"{r['connections_opened'] if r['connections_opened'] is not None else '-':>11}"
+        )
+    print(f"overhead removed per request: {per_request['median_ms'] - shared['median_ms']:.3f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""In-memory stand-ins for the Supabase client used by the benchmarks"""
+import time
+from collections import Counter
+from copy import deepcopy
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Subset of the PostgREST query builder used by the app"""
+    
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.order_by = []
+        self.limit_count = None
+        self.single_row = False
+    
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "FakeQuery":
+        self.operation = "select"
+        self.columns = columns
+        return self
+    
+    def insert(self, payload) -> "FakeQuery":
+        self.operation = "insert"
+        self.payload = payload
+        return self
+    
+    def upsert(self, payload, **kwargs) -> "FakeQuery":
+        self.operation = "upsert"
+        self.payload = payload
+        return self
+    
+    def update(self, payload: dict) -> "FakeQuery":
+        self.operation = "update"
+        self.payload = payload
+        return self
+    
+    def delete(self) -> "FakeQuery":
+        self.operation = "delete"
+        return self
+    
+    def eq(self, column: str, value) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+    
+    def neq(self, column: str, value) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+    
+    def in_(self, column: str, values) -> "FakeQuery":
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+    
+    def gt(self, column: str, value) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+    
+    def lt(self, column: str, value) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+    
+    def or_(self, expression: str) -> "FakeQuery":
+        # Only used for keyset pagination, which the pipeline benchmarks do not exercise
+        return self
+    
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self.order_by.append((column, desc))
+        return self
+    
+    def limit(self, count: int) -> "FakeQuery":
+        self.limit_count = count
+        return self
+    
+    def single(self) -> "FakeQuery":
+        self.single_row = True
+        return self
+    
+    def maybe_single(self) -> "FakeQuery":
+        return self.single()
+    
+    def execute(self) -> FakeResponse:
+        self.client.calls[f"{self.table}.{self.operation}"] += 1
+        if self.client.latency_ms > 0:
+            time.sleep(self.client.latency_ms / 1000)
+        
+        rows = self.client.tables.setdefault(self.table, [])
+        
+        if self.operation in ("insert", "upsert"):
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            inserted = []
+            for record in payload:
+                row = {"id": str(uuid4()), **deepcopy(record)}
+                rows.append(row)
+                inserted.append(deepcopy(row))
+            return FakeResponse(inserted)
+        
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        
+        if self.operation == "update":
+            for row in matched:
+                row.update(deepcopy(self.payload))
+            return FakeResponse(deepcopy(matched))
+        
+        if self.operation == "delete":
+            self.client.tables[self.table] = [row for row in rows if row not in matched]
+            return FakeResponse(deepcopy(matched))
+        
+        for column, desc in reversed(self.order_by):
+            matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if self.limit_count is not None:
+            matched = matched[:self.limit_count]
+        
+        result = [self._project(row) for row in matched]
+        if self.single_row:
+            return FakeResponse(result[0] if result else None)
+        return FakeResponse(result, count=len(result))
+    
+    def _project(self, row: dict) -> dict:
+        columns = [c.strip() for c in self.columns.split(",")]
+        if "*" in columns:
+            return deepcopy(row)
+        return {c: deepcopy(row.get(c)) for c in columns if "(" not in c}
+
+
+class FakeBucket:
+    def __init__(self, client: "FakeSupabase", bucket: str):
+        self.client = client
+        self.objects = client.buckets.setdefault(bucket, {})
+    
+    def _tick(self, operation: str) -> None:
+        self.client.calls[f"storage.{operation}"] += 1
+        if self.client.storage_latency_ms > 0:
+            time.sleep(self.client.storage_latency_ms / 1000)
+    
+    def upload(self, path: str, file, file_options: Optional[dict] = None) -> dict:
+        self._tick("upload")
+        self.objects[path] = bytes(file) if isinstance(file, (bytes, bytearray)) else file.read()
+        return {"path": path}
+    
+    def download(self, path: str) -> bytes:
+        self._tick("download")
+        if path not in self.objects:
+            raise Exception(f"Object not found: {path}")
+        return self.objects[path]
+    
+    def remove(self, paths: List[str]) -> list:
+        self._tick("remove")
+        return [self.objects.pop(p, None) for p in paths]
+    
+    def move(self, from_path: str, to_path: str) -> dict:
+        self._tick("move")
+        if from_path not in self.objects:
+            raise Exception(f"Object not found: {from_path}")
+        if to_path in self.objects:
+            raise Exception(f"The resource already exists: {to_path}")
+        self.objects[to_path] = self.objects.pop(from_path)
+        return {"message": "Successfully moved"}
+    
+    def exists(self, path: str) -> bool:
+        self._tick("exists")
+        return path in self.objects
+    
+    def create_signed_url(self, path: str, expires_in: int) -> dict:
+        self._tick("create_signed_url")
+        return {"signedURL": f"https://storage.invalid/{path}?token={uuid4().hex}&expires_in={expires_in}"}
+
+
+class FakeStorage:
+    def __init__(self, client: "FakeSupabase"):
+        self.client = client
+    
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.client, bucket)
+
+
+class FakeSupabase:
+    """In-memory tables and storage with optional per-call latency"""
+    
+    def __init__(self, latency_ms: float = 0.0, storage_latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.storage_latency_ms = storage_latency_ms
+        self.tables: Dict[str, List[dict]] = {}
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self.calls: Counter = Counter()
+        self.storage = FakeStorage(self)
+    
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
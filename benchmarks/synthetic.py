@@ -0,0 +1,43 @@
+"""Synthetic inputs shared by the benchmark scripts"""
+import random
+from typing import Dict
+
+import fitz  # PyMuPDF
+
+WORDS = (
+    "cell membrane protein enzyme energy reaction molecule structure function "
+    "system process theory model equation force mass velocity pressure volume "
+    "temperature gradient signal pathway receptor transport diffusion osmosis "
+    "photosynthesis respiration mitochondria nucleus genome replication "
+    "transcription translation mutation selection population ecosystem"
+).split()
+
+
+def make_page_text(rng: random.Random, words: int) -> str:
+    """Build a page of pseudo-sentences from a fixed vocabulary"""
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 18))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def make_pages(page_count: int, words_per_page: int = 400, seed: int = 0) -> Dict[int, str]:
+    """Build a page-number -> text mapping like extract_text_from_pdf returns"""
+    rng = random.Random(seed)
+    return {n: make_page_text(rng, words_per_page) for n in range(1, page_count + 1)}
+
+
+def make_pdf(page_count: int, words_per_page: int = 400, seed: int = 0) -> bytes:
+    """Render a text-only PDF with PyMuPDF"""
+    pages = make_pages(page_count, words_per_page, seed)
+    document = fitz.open()
+    for page_num in range(1, page_count + 1):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), pages[page_num], fontsize=7)
+    content = document.tobytes()
+    document.close()
+    return content
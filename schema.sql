@@ -2,6 +2,7 @@
 -- Run this in your Supabase SQL Editor
 
 -- Drop existing tables (in reverse order of dependencies)
+DROP TABLE IF EXISTS public.quiz_attempts CASCADE;
 DROP TABLE IF EXISTS public.mcqs CASCADE;
 DROP TABLE IF EXISTS public.mcq_sets CASCADE;
 DROP TABLE IF EXISTS public.pdfs CASCADE;
@@ -12,11 +13,14 @@ create table public.pdfs (
   user_id uuid not null,
   title text not null,
   storage_path text not null,
+  content_hash text,
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now()
 );
 
-create index on public.pdfs(user_id);
+-- Serves the newest-first PDF list and its keyset pagination
+create index on public.pdfs(user_id, created_at desc, id desc);
+create index on public.pdfs(content_hash);
 
 -- Table: mcq_sets
 create table public.mcq_sets (
@@ -25,12 +29,16 @@ create table public.mcq_sets (
   user_id uuid not null,
   model text not null,
   requested_count int not null check (requested_count between 1 and 500),
-  status text not null check (status in ('queued','running','done','failed')),
+  status text not null check (status in ('queued','running','partial','done','failed')),
   error text,
+  metrics jsonb,
   created_at timestamptz not null default now(),
   completed_at timestamptz
 );
 
+-- Latest (or active) set of a PDF
+create index on public.mcq_sets(pdf_id, user_id, status, created_at desc);
+
 -- Table: mcqs
 create table public.mcqs (
   id uuid primary key default gen_random_uuid(),
@@ -50,5 +58,21 @@ create table public.mcqs (
   fact_id text,
   flags text[] not null default '{}',
   created_at timestamptz not null default now(),
+  -- Also serves the idx-ordered MCQ listing and its keyset pagination
   unique(mcq_set_id, idx)
 );
+
+-- Table: quiz_attempts (answers and score only; results are rebuilt from the MCQs)
+create table public.quiz_attempts (
+  id uuid primary key default gen_random_uuid(),
+  mcq_set_id uuid not null references public.mcq_sets(id) on delete cascade,
+  user_id uuid not null,
+  mcq_ids uuid[] not null,
+  answers jsonb not null,
+  correct_count int not null,
+  total_questions int not null,
+  score_percentage numeric(5,2) not null,
+  created_at timestamptz not null default now()
+);
+
+create index on public.quiz_attempts(user_id, created_at desc);